@@ -1,4 +1,17 @@
+from .batch import SpectrumBatch
 from .dtransform import Spectrum
+from .functions import compose, cos, exp, log, sin, sincos, sqrt, tanh
 
 
-__all__ = ['Spectrum']
+__all__ = [
+    'Spectrum',
+    'SpectrumBatch',
+    'compose',
+    'cos',
+    'exp',
+    'log',
+    'sin',
+    'sincos',
+    'sqrt',
+    'tanh',
+]
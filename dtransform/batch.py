@@ -0,0 +1,298 @@
+"""Vectorized arithmetic over many spectra sharing a layout.
+
+A ``SpectrumBatch`` stacks the coefficient arrays of numeric spectra with
+the same layout and dtype into a single array of shape
+``(batch, *orders)``, so that arithmetic applies to all of them at once
+instead of looping over ``Spectrum`` objects.
+
+"""
+from typing import TYPE_CHECKING, Iterable, Iterator, Union
+
+import sympy as sp
+
+from .dtransform import Spectrum, numeric
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class SpectrumBatch:
+    """Stack of numeric spectra sharing variables, orders, truncation,
+    center, scaling and dtype.
+
+    """
+
+    __slots__ = ('__template', '__data')
+
+    def __init__(
+        self,
+        spectra: Iterable[Spectrum],
+        dtype: str | None = None
+    ) -> None:
+        if numeric is None:
+            raise ImportError(
+                "NumPy is required for spectrum batches"
+                " (pip install dtransform[numeric])"
+            )
+
+        spectra = list(spectra)
+        if not spectra:
+            raise ValueError("A batch needs at least one spectrum.")
+
+        if dtype is None:
+            dtype = spectra[0].dtype or "float64"
+
+        dtype = numeric.np.dtype(dtype)
+        spectra = [
+            spectrum if spectrum.dtype is not None and spectrum.dtype == dtype
+            else spectrum.to_numeric(dtype)
+            for spectrum in spectra
+        ]
+
+        template = spectra[0]
+        for spectrum in spectra[1:]:
+            template._check_compatibility(spectrum)
+
+        self.__template = template
+        self.__data = numeric.np.stack([s.array for s in spectra])
+
+    @classmethod
+    def from_array(
+        cls,
+        template: Spectrum,
+        array: 'np.ndarray'
+    ) -> 'SpectrumBatch':
+        """Batch with the layout and dtype of the numeric spectrum
+        ``template`` holding coefficient ``array`` of shape
+        ``(batch, *orders)``.
+
+        """
+        if template.dtype is None:
+            raise ValueError("Template spectrum must be numeric.")
+
+        if array.shape[1:] != template.orders:
+            raise ValueError("Coefficient array shape mismatch.")
+
+        return cls.__new(template, array.astype(template.dtype, copy=False))
+
+    @classmethod
+    def __new(
+        cls,
+        template: Spectrum,
+        data: 'np.ndarray'
+    ) -> 'SpectrumBatch':
+        new = object.__new__(cls)
+        new.__template = template
+        new.__data = data
+        return new
+
+    @property
+    def array(self) -> 'np.ndarray':
+        """Read-only stacked coefficient array of shape
+        ``(batch, *orders)``.
+
+        """
+        return numeric.readonly(self.__data)
+
+    @property
+    def dtype(self) -> 'np.dtype':
+        return self.__data.dtype
+
+    @property
+    def variables(self) -> tuple:
+        return self.__template.variables
+
+    @property
+    def orders(self) -> tuple[int, ...]:
+        return self.__template.orders
+
+    @property
+    def truncation(self) -> str:
+        return self.__template.truncation
+
+    @property
+    def center(self) -> dict:
+        return self.__template.center
+
+    @property
+    def scaling(self) -> dict:
+        return self.__template.scaling
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def __getitem__(
+        self,
+        key: int | slice
+    ) -> Union[Spectrum, 'SpectrumBatch']:
+        if isinstance(key, slice):
+            return self.__new(self.__template, self.__data[key])
+
+        return self.__template._with_array(self.__data[key])
+
+    def __iter__(self) -> Iterator[Spectrum]:
+        for row in self.__data:
+            yield self.__template._with_array(row)
+
+    def to_spectra(self) -> list[Spectrum]:
+        """Individual spectra of the batch."""
+        return list(self)
+
+    def evaluate(self, point: dict[str, int | float]) -> 'np.ndarray':
+        """Values of the reconstructed functions at ``point``, which
+        defaults to the expansion center for omitted variables.
+
+        """
+        values = self.__data
+        for var in reversed(self.variables):
+            t = (
+                point.get(str(var), self.center[var]) - self.center[var]
+            ) / self.scaling[var]
+            values = values @ numeric.np.power(
+                numeric.np.asarray(t, dtype=self.dtype),
+                numeric.np.arange(values.shape[-1])
+            )
+
+        return values
+
+    def inverse(self) -> list[sp.Expr]:
+        """Reconstructed functions of every spectrum of the batch
+        (Taylor expansions), sharing the monomials of the layout.
+
+        """
+        grid = self.__template._grid()
+        monomials = [
+            sp.Mul(*[
+                ((var - self.center[var]) / self.scaling[var]) ** k
+                for var, k in zip(self.variables, idx)
+            ])
+            for idx in grid.indices
+        ]
+
+        coeffs = self.__data.reshape(len(self), -1)[
+            :, list(grid.dense_offsets)
+        ]
+        return [
+            sp.simplify(sp.Add(*[
+                coeff * monomial
+                for coeff, monomial in zip(row, monomials)
+            ]))
+            for row in coeffs.tolist()
+        ]
+
+    def __check(self, other: Union['SpectrumBatch', Spectrum]) -> 'np.ndarray':
+        """Coefficients of a compatible batch or of a single spectrum
+        broadcast over the batch.
+
+        """
+        if isinstance(other, SpectrumBatch):
+            self.__template._check_compatibility(other.__template)
+            if len(other) != len(self):
+                raise ValueError("Batch size mismatch.")
+            return other.__data
+
+        self.__template._check_compatibility(other)
+        return other.array
+
+    def __scalar(
+        self,
+        other: int | float | complex | sp.Basic
+    ) -> float | complex:
+        return complex(other) if self.dtype.kind == 'c' else float(other)
+
+    def __neg__(self) -> 'SpectrumBatch':
+        return self.__new(self.__template, -self.__data)
+
+    def __add__(
+        self,
+        other: Union['SpectrumBatch', Spectrum]
+    ) -> 'SpectrumBatch':
+        return self.__new(self.__template, self.__data + self.__check(other))
+
+    def __radd__(self, other: Spectrum) -> 'SpectrumBatch':
+        return self.__add__(other)
+
+    def __sub__(
+        self,
+        other: Union['SpectrumBatch', Spectrum]
+    ) -> 'SpectrumBatch':
+        return self.__new(self.__template, self.__data - self.__check(other))
+
+    def __rsub__(self, other: Spectrum) -> 'SpectrumBatch':
+        return self.__new(self.__template, self.__check(other) - self.__data)
+
+    def __mul__(
+        self,
+        other: Union['SpectrumBatch', Spectrum, int, float, complex, sp.Basic]
+    ) -> 'SpectrumBatch':
+        if isinstance(other, (SpectrumBatch, Spectrum)):
+            data = numeric.convolve(
+                self.__data,
+                self.__check(other),
+                self.__template._mask(),
+                len(self.orders)
+            )
+        elif isinstance(other, (int, float, complex, sp.Basic)):
+            data = self.__data * self.__scalar(other)
+        else:
+            raise TypeError(
+                f'"SpectrumBatch" can\'t be multiplied by {type(other)}'
+            )
+
+        return self.__new(self.__template, data)
+
+    def __rmul__(
+        self,
+        other: Union[Spectrum, int, float, complex, sp.Basic]
+    ) -> 'SpectrumBatch':
+        return self.__mul__(other)
+
+    def __truediv__(
+        self,
+        other: Union['SpectrumBatch', Spectrum, int, float, complex, sp.Basic]
+    ) -> 'SpectrumBatch':
+        if isinstance(other, Spectrum):
+            return self * other.reciprocal()
+
+        if isinstance(other, SpectrumBatch):
+            if other.__data[0].size >= numeric.NEWTON_THRESHOLD:
+                return self * other.reciprocal()
+
+            return self.__new(self.__template, numeric.deconvolve(
+                self.__data,
+                self.__check(other),
+                self.__template._indices()
+            ))
+
+        if isinstance(other, (int, float, complex, sp.Basic)):
+            if other == 0:
+                raise ZeroDivisionError("Division by zero.")
+            return self.__new(
+                self.__template,
+                self.__data / self.__scalar(other)
+            )
+
+        raise TypeError(
+            '"SpectrumBatch" can only be divided by a batch,'
+            f' a Spectrum or a scalar, not {type(other)}.'
+        )
+
+    def __rtruediv__(self, other: Spectrum) -> 'SpectrumBatch':
+        self.__check(other)
+        return other * self.reciprocal()
+
+    def reciprocal(self) -> 'SpectrumBatch':
+        """Batch of the reciprocals ``1 / f`` of every spectrum."""
+        return self.__new(self.__template, numeric.reciprocal(
+            self.__data,
+            self.__template._mask(),
+            len(self.orders)
+        ))
+
+    def __repr__(self) -> str:
+        return (
+            f"SpectrumBatch(size={len(self)}, variables={self.variables},"
+            f" orders={self.orders}, center={dict(self.center)},"
+            f" scaling={dict(self.scaling)}, truncation='{self.truncation}',"
+            f" dtype={self.dtype})"
+        )
@@ -1,49 +1,347 @@
-from itertools import product
-from typing import Union
+from collections.abc import Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from fractions import Fraction
+from functools import lru_cache
+from math import ceil
+from operator import mul
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Union
 
 import sympy as sp
 
+from . import lazy as _lazy
+from . import layout, series
+from .layout import TRUNCATIONS
+
+try:
+    from . import numeric
+except ImportError:  # NumPy is an optional dependency
+    numeric = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+EVALUATORS = ("subs", "xreplace", "lambdify")
+
+
+def _derivatives(
+    expr: sp.Expr,
+    variables: tuple,
+    orders: tuple[int, ...],
+    budget: Fraction | None = None
+) -> Iterator[tuple[tuple[int, ...], sp.Expr]]:
+    """Yield ``(multi_idx, derivative)`` pairs in ``product`` order.
+
+    The multi-index lattice is walked depth-first, so every derivative is
+    obtained by a single differentiation of its parent and only one parent
+    per variable is kept alive at a time. With a ``budget`` set, only
+    multi-indices of weighted total degree below it are visited.
+
+    """
+    if not variables:
+        yield (), expr
+        return
+
+    var, rest = variables[0], variables[1:]
+    order = orders[0]
+    deriv = expr
+
+    if budget is not None:
+        order = min(order, ceil(order * budget))
+
+    for k in range(order):
+        if k:
+            deriv = sp.diff(deriv, var)
+
+        for idx, sub_deriv in _derivatives(
+            deriv,
+            rest,
+            orders[1:],
+            None if budget is None else budget - Fraction(k, orders[0])
+        ):
+            yield (k, *idx), sub_deriv
+
+
+@lru_cache(maxsize=1024)
+def _parse(expr: str) -> sp.Expr:
+    """Parse an expression string, memoizing recently used ones."""
+    return sp.sympify(expr)
+
+
+def _evaluator(center: dict, evaluate: str) -> Callable[[sp.Expr], sp.Expr]:
+    """Evaluate a single derivative at the expansion center."""
+    if evaluate == "subs":
+        return lambda deriv: deriv.subs(center)
+
+    rule = {var: sp.sympify(value) for var, value in center.items()}
+
+    def xreplace(deriv: sp.Expr) -> sp.Expr:
+        # unevaluated derivatives need the substitution semantics of subs
+        if deriv.has(sp.Derivative):
+            return deriv.subs(center)
+        return deriv.xreplace(rule)
+
+    return xreplace
+
+
+def _lambdify_at(derivs: list[sp.Expr], center: dict) -> list[sp.Expr]:
+    """Evaluate all derivatives at a numeric center with a single
+    compiled function (floating point results).
+
+    """
+    values = [sp.sympify(value) for value in center.values()]
+    fn = sp.lambdify(tuple(center), derivs, modules="mpmath")
+    results = fn(*[
+        float(value) if value.is_real else complex(value)
+        for value in values
+    ])
+
+    return [sp.sympify(result) for result in results]
+
+
+def _diff_coeffs(
+    expr: sp.Expr,
+    variables: tuple,
+    center: dict,
+    scaling: dict,
+    orders: tuple[int, ...],
+    truncation: str = "tensor",
+    prefix: tuple[int, ...] = (),
+    evaluate: str = "subs"
+) -> dict[tuple[int, ...], sp.Expr]:
+    """Compute spectrum coefficients by symbolic differentiation.
+
+    A non-empty ``prefix`` restricts the computation to the multi-indices
+    starting with it, ``expr`` being already differentiated accordingly
+    along the leading variables. ``evaluate`` selects how derivatives are
+    evaluated at the center (see ``EVALUATORS``).
+
+    """
+    coeffs = {}
+    budget = None
+    denoms = layout.denominators(orders, truncation)
+    powers = layout.scaling_powers(
+        orders,
+        truncation,
+        tuple(scaling[var] for var in variables)
+    )
+
+    if truncation == "total":
+        budget = 1 - layout.degree(prefix, orders)
+
+    derivs = _derivatives(
+        expr,
+        variables[len(prefix):],
+        orders[len(prefix):],
+        budget
+    )
+
+    if evaluate == "lambdify":
+        indices, batch = zip(*derivs)
+        evaluated = zip(indices, _lambdify_at(list(batch), center))
+    else:
+        at_center = _evaluator(center, evaluate)
+        evaluated = ((idx, at_center(deriv)) for idx, deriv in derivs)
+
+    # values at a numeric center already come out in canonical form
+    symbolic = not all(
+        sp.sympify(value).is_number for value in center.values()
+    )
+
+    for rest_idx, value in evaluated:
+        multi_idx = (*prefix, *rest_idx)
+        value = value * powers[multi_idx] / denoms[multi_idx]
+        coeffs[multi_idx] = series.canonical(value) if symbolic else value
+
+    return coeffs
+
+
+def _diff_coeffs_task(
+    expr: str,
+    variables: tuple,
+    center: dict,
+    scaling: dict,
+    orders: tuple[int, ...],
+    truncation: str,
+    prefix: tuple[int, ...],
+    evaluate: str
+) -> list[tuple[tuple[int, ...], str]]:
+    """Process pool entry point of ``_diff_coeffs``.
+
+    Expressions are passed in and out ``srepr``-encoded, while center and
+    scaling values are pickled as is so that plain numbers stay plain.
+
+    """
+    coeffs = _diff_coeffs(
+        sp.sympify(expr),
+        variables,
+        center,
+        scaling,
+        orders,
+        truncation,
+        prefix,
+        evaluate
+    )
+
+    return [(idx, sp.srepr(value)) for idx, value in coeffs.items()]
+
+
+def _parallel_diff_coeffs(
+    expr: sp.Expr,
+    variables: tuple,
+    center: dict,
+    scaling: dict,
+    orders: tuple[int, ...],
+    truncation: str,
+    executor: Executor,
+    evaluate: str = "subs"
+) -> dict[tuple[int, ...], sp.Expr]:
+    """``_diff_coeffs`` partitioned by the order of the first variable and
+    distributed over ``executor``.
+
+    """
+    args = (variables, center, scaling, orders, truncation)
+    futures = []
+    deriv = expr
+
+    for k in range(orders[0]):
+        if k:
+            deriv = sp.diff(deriv, variables[0])
+
+        futures.append(executor.submit(
+            _diff_coeffs_task,
+            sp.srepr(deriv),
+            *args,
+            (k,),
+            evaluate
+        ))
+
+    coeffs = {}
+    for future in futures:
+        for idx, value in future.result():
+            coeffs[idx] = sp.sympify(value)
+
+    return coeffs
+
+
+def _is_batch(other: object) -> bool:
+    """Whether ``other`` is a ``SpectrumBatch``, which implements the
+    reflected arithmetic with spectra.
+
+    """
+    from .batch import SpectrumBatch  # batch depends on this module
+
+    return isinstance(other, SpectrumBatch)
+
 
 class Spectrum:
 
     __slots__ = (
         '__expr',
         '__order',
-        '__center',
-        '__scaling',
-        '__coeffs',
-        '__variables',
+        '__layout',
+        '__data',
+        '__dtype',
         '__order_prod',
+        '__reciprocal',
+        '__owned',
     )
 
     def __init__(
         self,
-        expr: str,
-        order: int = 4,
+        expr: str | sp.Expr,
+        order: int | dict[str, int] = 4,
         center: dict[str, int | float] | None = None,
         scaling: dict[str, int | float] | None = None,
+        method: str = "diff",
+        truncation: str = "tensor",
+        dtype: str | None = None,
+        workers: int | None = None,
+        executor: Executor | None = None,
+        lazy: bool = False,
+        evaluate: str = "subs",
         **kwargs: int | float
     ) -> None:
-        if not isinstance(order, int) or order <= 0:
+        if not all(
+            isinstance(k, int) and k > 0
+            for k in (order.values() if isinstance(order, dict) else [order])
+        ):
             raise ValueError("Order must be a positive integer")
 
-        self.__order = order
-        self.__expr = sp.sympify(expr)
-        self.__center: dict = {}
-        self.__scaling: dict = {}
-        self.__variables = tuple(sorted(
+        if method not in ("diff", "recurrence"):
+            raise ValueError(
+                "Construction method must be 'diff' or 'recurrence'"
+            )
+
+        if truncation not in TRUNCATIONS:
+            raise ValueError("Truncation must be 'tensor' or 'total'")
+
+        if workers is not None and (
+            not isinstance(workers, int) or workers <= 0
+        ):
+            raise ValueError("Number of workers must be a positive integer")
+
+        if evaluate not in EVALUATORS:
+            raise ValueError(
+                "Evaluator must be 'subs', 'xreplace' or 'lambdify'"
+            )
+
+        if lazy and (
+            method != "diff"
+            or evaluate == "lambdify"
+            or dtype is not None
+            or workers is not None
+            or executor is not None
+        ):
+            raise ValueError(
+                "Lazy spectra support only symbolic coefficients"
+                " computed by the 'diff' method"
+            )
+
+        if isinstance(expr, sp.Basic):
+            self.__expr = expr
+        elif isinstance(expr, str):
+            self.__expr = _parse(expr)
+        else:
+            self.__expr = sp.sympify(expr)
+        expansion_center: dict = {}
+        scaling_constants: dict = {}
+        variables = tuple(sorted(
             self.__expr.free_symbols,
             key=lambda s: s.name
         ))
 
+        # per-variable expansion orders, collapsed to an int when isotropic
+        if isinstance(order, dict):
+            _order = {str(var): k for var, k in order.items()}
+
+            for var in variables:
+                if str(var) not in _order:
+                    raise ValueError(
+                        f"Expansion order for variable '{var}'"
+                        " is not specified"
+                    )
+
+            orders = tuple(_order[str(v)] for v in variables)
+            if len(set(orders)) == 1:
+                order = orders[0]
+            else:
+                order = dict(zip(variables, orders))
+
+            del _order
+        else:
+            orders = (order,) * len(variables)
+
+        self.__order = order
+
         # populate values or use defaults for center and scaling
         _center = (center or {}) | kwargs
         _scaling = scaling or {}
 
-        for var in self.__variables:
+        for var in variables:
             str_var = str(var)
 
-            self.__center[var] = _center.get(str_var, 0)
+            expansion_center[var] = _center.get(str_var, 0)
 
             if (scale := _scaling.get(str_var, 1)) <= 0:
                 raise ValueError(
@@ -51,47 +349,150 @@ class Spectrum:
                     " must be a positive integer"
                 )
 
-            self.__scaling[var] = scale
+            scaling_constants[var] = scale
 
         del _center, _scaling
 
+        if evaluate == "lambdify" and not all(
+            sp.sympify(value).is_number for value in expansion_center.values()
+        ):
+            raise ValueError("The 'lambdify' evaluator needs a numeric center")
+
         # Compute DTM coefficients around center (transformation spectrum)
-        coeffs = {}
+        def differentiate(expr: sp.Expr) -> dict[tuple[int, ...], sp.Expr]:
+            if pool is None or not variables:
+                return _diff_coeffs(
+                    expr,
+                    variables,
+                    expansion_center,
+                    scaling_constants,
+                    orders,
+                    truncation,
+                    evaluate=evaluate
+                )
 
-        for multi_idx in product(*[range(order)] * len(self.__variables)):
-            deriv = self.__expr
-            for var, k in zip(self.__variables, multi_idx):
-                deriv = sp.diff(deriv, var, k)
+            return _parallel_diff_coeffs(
+                expr,
+                variables,
+                expansion_center,
+                scaling_constants,
+                orders,
+                truncation,
+                pool,
+                evaluate
+            )
 
-            denom = sp.prod([sp.factorial(k) for k in multi_idx])
-            H_terms = sp.prod([
-                self.__scaling[var] ** k
-                for var, k in zip(self.__variables, multi_idx)
-            ])
-            value = deriv.subs(self.__center) * H_terms / denom
-            coeffs[multi_idx] = value
+        self.__layout = layout.intern(
+            variables,
+            orders,
+            truncation,
+            expansion_center,
+            scaling_constants
+        )
+        grid = self.__layout.grid
 
-        self.__coeffs: dict[tuple[int, ...], sp.Expr] = coeffs
+        def build() -> list:
+            if method == "recurrence":
+                return series.transform(
+                    self.__expr,
+                    variables,
+                    expansion_center,
+                    scaling_constants,
+                    grid,
+                    lambda node: grid.flatten(differentiate(node))
+                )
+
+            return grid.flatten(differentiate(self.__expr))
+
+        pool = executor
+        if lazy:
+            data = _lazy.diff_coeffs(
+                self.__expr,
+                variables,
+                _evaluator(expansion_center, evaluate),
+                scaling_constants,
+                orders,
+                truncation
+            )
+        elif pool is None and workers is not None and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                data = build()
+        else:
+            data = build()
+
+        # flat row-major storage laid out by the layout grid, a lazy
+        # mapping, or an array of shape ``orders`` for numeric spectra
+        self.__data: list | _lazy.LazyCoefficients | np.ndarray = data
+        self.__dtype = None
+        self.__reciprocal: Spectrum | None = None
+        # whether ``__data`` is private to this spectrum (copy-on-write)
+        self.__owned = True
+
+        if dtype is not None:
+            self.__set_numeric(dtype)
 
     @property
-    def order(self) -> int:
+    def order(self) -> int | dict:
         return self.__order
 
+    @property
+    def orders(self) -> tuple[int, ...]:
+        """Expansion order of every variable."""
+        return self.__layout.orders
+
     @property
     def scaling(self) -> dict:
-        return self.__scaling
+        return self.__layout.scaling
+
+    @property
+    def truncation(self) -> str:
+        return self.__layout.truncation
 
     @property
     def variables(self) -> tuple:
-        return self.__variables
+        return self.__layout.variables
 
     @property
-    def coeffs(self) -> dict:
-        return self.__coeffs
+    def coeffs(self) -> Mapping:
+        """Read-only mapping of multi-indices to coefficients."""
+        if self.lazy:
+            return self.__data
+
+        if self.__dtype is not None:
+            grid = self._grid()
+            return layout.Coefficients(
+                self.__data.ravel()[list(grid.dense_offsets)].tolist(),
+                grid
+            )
+
+        self.__owned = False
+        return layout.Coefficients(self.__data, self._grid())
+
+    @property
+    def lazy(self) -> bool:
+        """Whether coefficients are computed on demand."""
+        return isinstance(self.__data, _lazy.LazyCoefficients)
+
+    @property
+    def dtype(self) -> 'np.dtype | None':
+        """NumPy dtype of numeric coefficients, ``None`` if symbolic."""
+        return self.__dtype
+
+    @property
+    def array(self) -> 'np.ndarray | None':
+        """Read-only dense coefficient array of shape ``orders`` of a
+        numeric spectrum, ``None`` if symbolic.
+
+        """
+        if self.__dtype is None:
+            return None
+
+        self.__owned = False
+        return numeric.readonly(self.__data)
 
     @property
     def center(self) -> dict:
-        return self.__center
+        return self.__layout.center
 
     def inverse(self) -> sp.Expr:
         """Reconstruct function from transformation spectrum
@@ -99,45 +500,481 @@ class Spectrum:
 
         """
         reconstructed = 0
-        for multi_idx, coeff in self.__coeffs.items():
+        for multi_idx, coeff in self.coeffs.items():
             term = coeff
-            for var, power in zip(self.__variables, multi_idx):
-                a = self.__center.get(var, 0)
-                term *= ((var - a) / self.__scaling[var]) ** power
+            for var, power in zip(self.__layout.variables, multi_idx):
+                a = self.__layout.center.get(var, 0)
+                term *= ((var - a) / self.__layout.scaling[var]) ** power
             reconstructed += term
 
         return sp.simplify(reconstructed)
 
+    def reciprocal(self) -> 'Spectrum':
+        """Spectrum of ``1 / f`` computed by Newton iteration (the
+        triangular recurrence for lazy spectra).
+
+        The result is cached (until the spectrum is modified in place),
+        so that repeated divisions by the same spectrum cost a single
+        product each.
+
+        """
+        if self.__reciprocal is not None:
+            return self.__reciprocal
+
+        new = self.clone()
+        if self.__dtype is not None:
+            new.__data = numeric.reciprocal(self.__data, self.__mask())
+        elif self.lazy:
+            one = self._grid().zeros()
+            one[0] = sp.S.One
+            new.__data = _lazy.quotient(
+                layout.Coefficients(one, self._grid()),
+                self.__data,
+                self._indices()
+            )
+        else:
+            new.__data = series.reciprocal(self.__data, self._grid())
+
+        self.__reciprocal = new
+        return new.clone()
+
+    def diff(self, variable: str | sp.Symbol, k: int = 1) -> 'Spectrum':
+        """Spectrum of the ``k``-th partial derivative in ``variable``.
+
+        The coefficients are shifted down along the variable and scaled
+        by ``(m + 1) ... (m + k) / H ** k``. Coefficients shifted in from
+        outside the index set are lost to the truncation and left zero.
+
+        """
+        if not isinstance(k, int) or k < 0:
+            raise ValueError("Derivative order must be a non-negative integer")
+
+        axis = self.__axis(variable)
+        scale = self.__layout.scaling[self.variables[axis]]
+
+        new = self.clone()
+        if self.__dtype is not None:
+            new.__data = numeric.derivative(
+                self.__data,
+                axis,
+                k,
+                self.__scalar(scale)
+            )
+        elif self.lazy:
+            new.__data = _lazy.derivative(
+                self.__data,
+                axis,
+                k,
+                scale,
+                self._indices()
+            )
+        else:
+            new.__data = series.derivative(
+                self.__data,
+                axis,
+                k,
+                scale,
+                self._grid()
+            )
+        return new
+
+    def integrate(
+        self,
+        variable: str | sp.Symbol,
+        constant: Union['Spectrum', int, float, complex, sp.Basic] = 0
+    ) -> 'Spectrum':
+        """Spectrum of the antiderivative in ``variable`` equal to
+        ``constant`` at the expansion center of the variable.
+
+        The coefficients are shifted up along the variable and scaled by
+        ``H / m``, those shifted out of the index set are dropped. A
+        spectrum ``constant`` must not depend on ``variable``.
+
+        """
+        axis = self.__axis(variable)
+        scale = self.__layout.scaling[self.variables[axis]]
+
+        if isinstance(constant, Spectrum):
+            self._check_compatibility(constant)
+            if any(
+                coeff != 0
+                for idx, coeff in constant.coeffs.items()
+                if idx[axis]
+            ):
+                raise ValueError(
+                    "Integration constant must not depend on"
+                    f" variable '{self.variables[axis]}'"
+                )
+            return self.integrate(variable) + constant
+
+        new = self.clone()
+        if self.__dtype is not None:
+            new.__data = numeric.integral(
+                self.__data,
+                axis,
+                self.__scalar(scale),
+                self.__scalar(constant),
+                self.__mask()
+            )
+        elif self.lazy:
+            new.__data = _lazy.integral(
+                self.__data,
+                axis,
+                scale,
+                sp.sympify(constant),
+                self._indices()
+            )
+        else:
+            new.__data = series.integral(
+                self.__data,
+                axis,
+                scale,
+                sp.sympify(constant),
+                self._grid()
+            )
+        return new
+
+    def revert(self) -> 'Spectrum':
+        """Spectrum of the inverse function of a univariate spectrum
+        ``y = f(x)``, expanded in the same variable around ``f(a)`` with
+        the order, scaling and truncation of this one.
+
+        Requires a non-zero linear coefficient. The coefficients are
+        determined one at a time from ``f(g(y)) == y`` with a table of the
+        powers of ``g``. The result keeps the expression of this spectrum,
+        as the inverse function rarely has a closed form.
+
+        """
+        if len(self.variables) != 1:
+            raise ValueError("Series reversion requires a univariate spectrum")
+
+        var, = self.variables
+        if self.orders[0] < 2 or self.coeffs[(1,)] == 0:
+            raise ValueError(
+                "Series reversion requires a non-zero linear coefficient"
+            )
+
+        center = self.__layout.center[var]
+        scale = self.__layout.scaling[var]
+
+        new = self.clone()
+        new.__layout = layout.intern(
+            self.variables,
+            self.orders,
+            self.truncation,
+            {var: self.coeffs[(0,)]},
+            {var: scale}
+        )
+        if self.__dtype is not None:
+            new.__data = numeric.revert(
+                self.__data,
+                self.__scalar(center),
+                self.__scalar(scale)
+            )
+        elif self.lazy:
+            new.__data = _lazy.revert(
+                self.__data,
+                center,
+                scale,
+                self._indices()
+            )
+        else:
+            new.__data = series.revert(self.__data, center, scale)
+        return new
+
+    def __axis(self, variable: str | sp.Symbol) -> int:
+        """Position of ``variable`` among the spectrum variables."""
+        for axis, var in enumerate(self.__layout.variables):
+            if str(var) == str(variable):
+                return axis
+
+        raise ValueError(f"Spectrum does not depend on variable '{variable}'")
+
+    @staticmethod
+    def sum(spectra: Iterable['Spectrum']) -> 'Spectrum':
+        """Sum of compatible spectra accumulated in place into a single
+        coefficient buffer.
+
+        """
+        spectra = iter(spectra)
+        try:
+            total = next(spectra).clone()
+        except StopIteration:
+            raise ValueError("Sum of an empty sequence of spectra.") from None
+
+        for spectrum in spectra:
+            total += spectrum
+
+        return total
+
+    @staticmethod
+    def linear_combination(
+        terms: Iterable[tuple[int | float | complex | sp.Basic, 'Spectrum']]
+    ) -> 'Spectrum':
+        """Spectrum of ``a1 * S1 + a2 * S2 + ...`` computed in a single
+        pass, without intermediate spectra.
+
+        """
+        terms = list(terms)
+        if not terms:
+            raise ValueError("Linear combination of no spectra.")
+
+        first = terms[0][1]
+        for _, spectrum in terms[1:]:
+            first._check_compatibility(spectrum)
+
+        new = first.clone()
+        if first.__dtype is not None:
+            new.__data = numeric.linear_combination([
+                (first.__scalar(weight), spectrum.__data)
+                for weight, spectrum in terms
+            ])
+        elif any(spectrum.lazy for _, spectrum in terms):
+            weights = [weight for weight, _ in terms]
+            new.__data = _lazy.elementwise(
+                lambda *values: sp.Add(*map(mul, weights, values)),
+                first._indices(),
+                *(spectrum.coeffs for _, spectrum in terms)
+            )
+        else:
+            new.__data = series.linear_combination([
+                (sp.sympify(weight), spectrum.__data)
+                for weight, spectrum in terms
+            ])
+        new.__owned = True
+
+        return new
+
+    @staticmethod
+    def sum_of_products(
+        pairs: Iterable[tuple['Spectrum', 'Spectrum']]
+    ) -> 'Spectrum':
+        """Spectrum of ``S1 * S2 + S3 * S4 + ...`` computed in a single
+        pass, without intermediate spectra.
+
+        """
+        pairs = list(pairs)
+        if not pairs:
+            raise ValueError("Sum of products of no spectra.")
+
+        first = pairs[0][0]
+        for pair in pairs:
+            for spectrum in pair:
+                first._check_compatibility(spectrum)
+
+        new = first.clone()
+        if first.__dtype is not None:
+            new.__data = numeric.sum_of_products(
+                [(a.__data, b.__data) for a, b in pairs],
+                first.__mask()
+            )
+        elif any(a.lazy or b.lazy for a, b in pairs):
+            new.__data = _lazy.sum_of_products(
+                [(a.coeffs, b.coeffs) for a, b in pairs],
+                first._indices()
+            )
+        else:
+            new.__data = series.sum_of_products(
+                [(a.__data, b.__data) for a, b in pairs],
+                first._grid()
+            )
+        new.__owned = True
+
+        return new
+
+    @staticmethod
+    def divide_many(
+        numerators: Iterable['Spectrum'],
+        denominator: 'Spectrum'
+    ) -> list['Spectrum']:
+        """Quotients of every numerator by a shared denominator. Where
+        division goes through the reciprocal (large numeric spectra and
+        rational dense tensor grids), it is computed once for all of them.
+
+        """
+        numerators = list(numerators)
+        for numerator in numerators:
+            numerator._check_compatibility(denominator)
+
+        return [numerator / denominator for numerator in numerators]
+
     def clone(self) -> 'Spectrum':
         new = object.__new__(Spectrum)
         new.__expr = self.__expr
         new.__order = self.__order
-        new.__scaling = self.__scaling
-        new.__variables = self.__variables
-        new.__center = self.__center
-        new.__coeffs = self.__coeffs
+        new.__layout = self.__layout
+        new.__data = self.__data
+        new.__dtype = self.__dtype
+        new.__reciprocal = None
+        new.__owned = self.__owned = False
+
+        return new
+
+    def to_numeric(self, dtype: str = "float64") -> 'Spectrum':
+        """Copy of the spectrum with coefficients stored in a dense NumPy
+        array, enabling vectorized arithmetic.
+
+        """
+        new = self.clone()
+        new.__set_numeric(dtype)
+        return new
+
+    def __set_numeric(self, dtype: str) -> None:
+        if numeric is None:
+            raise ImportError(
+                "NumPy is required for numeric spectra"
+                " (pip install dtransform[numeric])"
+            )
+
+        _dtype = numeric.np.dtype(dtype)
+        if _dtype.kind not in 'fc':
+            raise ValueError("Numeric dtype must be a float or complex type")
+
+        for var in self.__layout.variables:
+            if not (
+                sp.sympify(self.__layout.center[var]).is_number
+                and sp.sympify(self.__layout.scaling[var]).is_number
+            ):
+                raise ValueError(
+                    "Numeric spectra require numeric center and scaling"
+                    f" for variable '{var}'"
+                )
+
+        if self.__dtype is not None:
+            self.__data = self.__data.astype(_dtype)
+        else:
+            data = self.__data
+            if self.lazy:
+                data = self._grid().flatten(data)
+
+            self.__data = numeric.from_flat(
+                data,
+                self.__layout.orders,
+                self._grid().dense_offsets,
+                _dtype
+            )
+
+        self.__dtype = _dtype
+        self.__owned = True
+
+    def __scalar(
+        self,
+        other: int | float | complex | sp.Basic
+    ) -> float | complex:
+        return complex(other) if self.__dtype.kind == 'c' else float(other)
+
+    def __divides_by_reciprocal(self, other: 'Spectrum') -> bool:
+        if self.__dtype is not None:
+            return self.__data.size >= numeric.NEWTON_THRESHOLD
+
+        if self.lazy or other.lazy:
+            return False
+
+        return series.prefers_reciprocal(other.__data, self._grid())
+
+    def __buffer(self) -> 'list | np.ndarray':
+        """Coefficient storage which is safe to modify in place, copied
+        first if it is shared with other spectra.
+
+        """
+        if not self.__owned:
+            self.__data = self.__data.copy()
+            self.__owned = True
+
+        self.__reciprocal = None
+        return self.__data
 
+    def __adopt(self, other: 'Spectrum') -> 'Spectrum':
+        """Take over the freshly computed coefficients of ``other``."""
+        self.__data = other.__data
+        self.__owned = True
+        self.__reciprocal = None
+        return self
+
+    def __mask(self) -> 'np.ndarray | None':
+        return numeric.mask(self.__layout.orders, self.__layout.truncation)
+
+    def _grid(self) -> layout.Grid:
+        return self.__layout.grid
+
+    def _indices(self) -> tuple[tuple[int, ...], ...]:
+        return self._grid().indices
+
+    def _mask(self) -> 'np.ndarray | None':
+        return self.__mask()
+
+    def _with_array(self, array: 'np.ndarray') -> 'Spectrum':
+        """Numeric spectrum of the same layout and dtype holding the
+        coefficient ``array``, which it shares until modified in place.
+
+        """
+        new = self.clone()
+        new.__data = array.astype(self.__dtype, copy=False)
         return new
 
+    def _map(
+        self,
+        exact: Callable[[list, layout.Grid], tuple],
+        lazy: Callable[[Mapping, tuple], tuple],
+        array: Callable[['np.ndarray', tuple], tuple]
+    ) -> tuple['Spectrum', ...]:
+        """Spectra of the same layout holding the coefficients returned by
+        the kernel for the storage of this spectrum (one spectrum per
+        returned coefficient storage).
+
+        """
+        if self.__dtype is not None:
+            results = [
+                data.astype(self.__dtype, copy=False)
+                for data in array(self.__data, self._indices())
+            ]
+        elif self.lazy:
+            results = lazy(self.__data, self._indices())
+        else:
+            results = exact(self.__data, self._grid())
+
+        spectra = []
+        for data in results:
+            new = self.clone()
+            new.__data = data
+            spectra.append(new)
+
+        return tuple(spectra)
+
     def display_coefficients(self) -> None:
         """Print non-zero transformation spectrum coefficients."""
         for idx, val in sorted(self.coeffs.items()):
             print(f"Spectrum[{idx}] = {val}")
 
     def _check_compatibility(self, other: 'Spectrum') -> None:
-        if self.__variables != other.variables:
-            raise ValueError("Variables do not match.")
-        if self.__order != other.order:
-            raise ValueError("Expansion order mismatch.")
-        if self.__scaling != other.scaling:
-            raise ValueError("Scaling constants mismatch.")
-        if self.__center != other.center:
-            raise ValueError("Expansion center mismatch.")
+        # layouts are interned, so compatible spectra almost always share
+        # the same one (only e.g. a center of 1 and 1.0 are told apart)
+        if self.__layout is not other.__layout:
+            if self.variables != other.variables:
+                raise ValueError("Variables do not match.")
+            if self.orders != other.orders:
+                raise ValueError("Expansion order mismatch.")
+            if self.truncation != other.truncation:
+                raise ValueError("Truncation mismatch.")
+            if self.scaling != other.scaling:
+                raise ValueError("Scaling constants mismatch.")
+            if self.center != other.center:
+                raise ValueError("Expansion center mismatch.")
+        if not self.__same_dtype(other):
+            raise ValueError("Coefficient dtype mismatch.")
+
+    def __same_dtype(self, other: 'Spectrum') -> bool:
+        # NumPy dtypes compare equal to None (the default float64 dtype)
+        if self.__dtype is None or other.dtype is None:
+            return self.__dtype is other.dtype
+
+        return self.__dtype == other.dtype
 
     def __repr__(self) -> str:
         return (
             f"Spectrum(expr='{str(self.__expr)}', order={self.__order},"
-            f" center={self.__center}, scaling={self.__scaling})"
+            f" center={dict(self.center)}, scaling={dict(self.scaling)},"
+            f" truncation='{self.truncation}')"
         )
 
     def __eq__(self, other: object) -> bool:
@@ -145,67 +982,125 @@ class Spectrum:
             return False
 
         return (
-            self.__order == other.order
-            and self.__scaling == other.scaling
-            and self.__variables == other.variables
-            and self.__center == other.center
-            and self.__coeffs == other.coeffs
+            self.__layout == other.__layout
+            and self.__same_dtype(other)
+            and self.__equal_data(other)
         )
 
+    def __equal_data(self, other: 'Spectrum') -> bool:
+        if self.__dtype is not None:
+            return numeric.np.array_equal(self.__data, other.__data)
+
+        if self.lazy or other.lazy:
+            return self.coeffs == other.coeffs
+
+        return self.__data == other.__data
+
     def __neg__(self) -> 'Spectrum':
         new = self.clone()
-        new.__coeffs = {k: -v for k, v in self.__coeffs.items()}
+        if self.__dtype is not None:
+            new.__data = -self.__data
+        elif self.lazy:
+            new.__data = _lazy.elementwise(
+                lambda v: -v,
+                self._indices(),
+                self.__data
+            )
+        else:
+            new.__data = [-v for v in self.__data]
         return new
 
     def __add__(self, other: 'Spectrum') -> 'Spectrum':
+        if not isinstance(other, Spectrum) and _is_batch(other):
+            return NotImplemented
+
         self._check_compatibility(other)
 
         new = self.clone()
-        new.__coeffs = {
-            k: self.__coeffs.get(k, 0) + other.coeffs.get(k, 0)
-            for k in (frozenset(self.__coeffs) | frozenset(other.coeffs))
-        }
+        if self.__dtype is not None:
+            new.__data = self.__data + other.__data
+            return new
+
+        if self.lazy or other.lazy:
+            new.__data = _lazy.elementwise(
+                lambda a, b: a + b,
+                self._indices(),
+                self.coeffs,
+                other.coeffs
+            )
+            return new
+
+        new.__data = [a + b for a, b in zip(self.__data, other.__data)]
 
         return new
 
     def __sub__(self, other: 'Spectrum') -> 'Spectrum':
+        if not isinstance(other, Spectrum) and _is_batch(other):
+            return NotImplemented
+
         self._check_compatibility(other)
 
         new = self.clone()
-        new.__coeffs = {
-            k: self.__coeffs.get(k, 0) - other.coeffs.get(k, 0)
-            for k in (frozenset(self.__coeffs) | frozenset(other.coeffs))
-        }
+        if self.__dtype is not None:
+            new.__data = self.__data - other.__data
+            return new
+
+        if self.lazy or other.lazy:
+            new.__data = _lazy.elementwise(
+                lambda a, b: a - b,
+                self._indices(),
+                self.coeffs,
+                other.coeffs
+            )
+            return new
+
+        new.__data = [a - b for a, b in zip(self.__data, other.__data)]
 
         return new
 
     def __mul__(
         self,
-        other: Union['Spectrum', int, float, sp.Basic]
+        other: Union['Spectrum', int, float, complex, sp.Basic]
     ) -> 'Spectrum':
         if isinstance(other, Spectrum):
             self._check_compatibility(other)
 
             new = self.clone()
-            coeffs = {}
-
-            for idx in product(*[range(self.__order)] * len(self.variables)):
-                val = 0
-                for i in product(*[range(k + 1) for k in idx]):
-                    j = tuple(k - l for k, l in zip(idx, i))
-                    val += self.__coeffs.get(i, 0) * other.coeffs.get(j, 0)
-                coeffs[idx] = val
-
-            new.__coeffs = coeffs
+            if self.__dtype is not None:
+                new.__data = numeric.convolve(
+                    self.__data,
+                    other.__data,
+                    self.__mask()
+                )
+            elif self.lazy or other.lazy:
+                new.__data = _lazy.cauchy(
+                    self.coeffs,
+                    other.coeffs,
+                    self._indices()
+                )
+            else:
+                new.__data = series.cauchy(
+                    self.__data,
+                    other.__data,
+                    self._grid()
+                )
             return new
-        elif isinstance(other, (int, float, sp.Basic)):
+        elif isinstance(other, (int, float, complex, sp.Basic)):
             new = self.clone()
-            new.__coeffs = {
-                k: other * v
-                for k, v in self.__coeffs.items()
-            }
+            if self.__dtype is not None:
+                new.__data = self.__data * self.__scalar(other)
+            elif self.lazy:
+                new.__data = _lazy.elementwise(
+                    lambda v: other * v,
+                    self._indices(),
+                    self.__data
+                )
+            else:
+                new.__data = [other * v for v in self.__data]
             return new
 
+        elif _is_batch(other):
+            return NotImplemented
         else:
             raise TypeError(
                 f'"Spectrum" can\'t be multiplied by {type(other)}'
@@ -213,51 +1108,206 @@ class Spectrum:
 
     def __rmul__(
         self,
-        other: Union['Spectrum', int, float, sp.Basic]
+        other: Union['Spectrum', int, float, complex, sp.Basic]
     ) -> 'Spectrum':
         return self.__mul__(other)
 
+    def __pow__(self, exponent: int | float | sp.Basic) -> 'Spectrum':
+        """Integer powers by binary exponentiation (negative ones of the
+        reciprocal), other constant powers by the DTM power recurrence,
+        which requires a non-zero leading coefficient.
+
+        The reciprocal is taken from ``reciprocal()`` only where division
+        would use it, otherwise it is the quotient ``1 / f`` and nothing
+        is cached.
+
+        """
+        if isinstance(exponent, (int, sp.Integer)):
+            exponent = int(exponent)
+            if exponent < 0:
+                if self.__divides_by_reciprocal(self):
+                    base = self.reciprocal()
+                else:
+                    base = self.__one() / self
+                return base ** -exponent
+            if exponent == 0:
+                return self.__one()
+
+            result, base = None, self
+            while exponent:
+                if exponent & 1:
+                    result = base if result is None else result * base
+                exponent >>= 1
+                if exponent:
+                    base = base * base
+            return self.clone() if result is self else result
+
+        if not isinstance(exponent, (float, complex, sp.Basic)):
+            return NotImplemented
+
+        new = self.clone()
+        if self.__dtype is not None:
+            new.__data = numeric.power(
+                self.__data,
+                self.__scalar(exponent),
+                self._indices()
+            )
+        elif self.lazy:
+            new.__data = _lazy.power(
+                self.__data,
+                sp.sympify(exponent),
+                self._indices()
+            )
+        else:
+            new.__data = series.power(
+                self.__data,
+                sp.sympify(exponent),
+                self._grid()
+            )
+        return new
+
+    def __one(self) -> 'Spectrum':
+        """Spectrum of the constant one with the layout of this one."""
+        new = self.clone()
+        if self.__dtype is not None:
+            new.__data = numeric.np.zeros_like(self.__data)
+            new.__data.flat[0] = 1
+        else:
+            new.__data = self._grid().zeros()
+            new.__data[0] = sp.S.One
+        return new
+
     def __truediv__(
         self,
-        other: Union['Spectrum', int, float, sp.Basic]
+        other: Union['Spectrum', int, float, complex, sp.Basic]
     ) -> 'Spectrum':
         if isinstance(other, Spectrum):
             self._check_compatibility(other)
 
-            new = self.clone()
-            n_vars = len(self.__variables)
-            coeffs: dict[tuple[int, ...], sp.Expr] = {}
-            zeros = (0,) * n_vars
+            # the cached reciprocal is only used where it is chosen anyway,
+            # so that the result never depends on earlier calls
+            if self.__divides_by_reciprocal(other):
+                return self * other.reciprocal()
 
-            if (zeros_coeff := other.coeffs.get(zeros)) == 0:
-                raise ZeroDivisionError(
-                    "Leading coefficient of denominator is zero."
+            new = self.clone()
+            if self.__dtype is not None:
+                new.__data = numeric.deconvolve(
+                    self.__data,
+                    other.__data,
+                    self._indices()
+                )
+            elif self.lazy or other.lazy:
+                new.__data = _lazy.quotient(
+                    self.coeffs,
+                    other.coeffs,
+                    self._indices()
+                )
+            else:
+                new.__data = series.quotient(
+                    self.__data,
+                    other.__data,
+                    self._grid()
                 )
-
-            for idx in product(*[range(self.__order)] * n_vars):
-                val = self.__coeffs.get(idx, 0)
-
-                for i in product(*[range(k + 1) for k in idx]):
-                    j = tuple(k - l for k, l in zip(idx, i))
-                    if j != idx:
-                        val -= other.coeffs.get(i, 0) * coeffs.get(j, 0)
-
-                coeffs[idx] = val / zeros_coeff
-
-            new.__coeffs = coeffs
             return new
-        elif isinstance(other, (int, float, sp.Basic)):
+        elif isinstance(other, (int, float, complex, sp.Basic)):
             if other == 0:
                 raise ZeroDivisionError("Division by zero.")
 
             new = self.clone()
-            new.__coeffs = {
-                k: v / other
-                for k, v in self.__coeffs.items()
-            }
+            if self.__dtype is not None:
+                new.__data = self.__data / self.__scalar(other)
+            elif self.lazy:
+                new.__data = _lazy.elementwise(
+                    lambda v: v / other,
+                    self._indices(),
+                    self.__data
+                )
+            else:
+                new.__data = [v / other for v in self.__data]
             return new
+        elif _is_batch(other):
+            return NotImplemented
         else:
             raise TypeError(
                 '"Spectrum" can only be divided by'
                 f' another Spectrum or a scalar, not {type(other)}.'
             )
+
+    def __iadd__(self, other: 'Spectrum') -> 'Spectrum':
+        if not isinstance(other, Spectrum) and _is_batch(other):
+            return NotImplemented
+
+        self._check_compatibility(other)
+
+        if self.lazy or other.lazy:
+            return self + other
+
+        data = self.__buffer()
+        if self.__dtype is not None:
+            data += other.__data
+        else:
+            for offset in series.support(other.__data, self._grid()):
+                data[offset] += other.__data[offset]
+
+        return self
+
+    def __isub__(self, other: 'Spectrum') -> 'Spectrum':
+        if not isinstance(other, Spectrum) and _is_batch(other):
+            return NotImplemented
+
+        self._check_compatibility(other)
+
+        if self.lazy or other.lazy:
+            return self - other
+
+        data = self.__buffer()
+        if self.__dtype is not None:
+            data -= other.__data
+        else:
+            for offset in series.support(other.__data, self._grid()):
+                data[offset] -= other.__data[offset]
+
+        return self
+
+    def __imul__(
+        self,
+        other: Union['Spectrum', int, float, complex, sp.Basic]
+    ) -> 'Spectrum':
+        if self.lazy or isinstance(other, Spectrum):
+            product = self * other
+            return product if product.lazy else self.__adopt(product)
+
+        if not isinstance(other, (int, float, complex, sp.Basic)):
+            return self * other
+
+        data = self.__buffer()
+        if self.__dtype is not None:
+            data *= self.__scalar(other)
+        else:
+            for offset, value in enumerate(data):
+                data[offset] = other * value
+
+        return self
+
+    def __itruediv__(
+        self,
+        other: Union['Spectrum', int, float, complex, sp.Basic]
+    ) -> 'Spectrum':
+        if self.lazy or isinstance(other, Spectrum):
+            quotient = self / other
+            return quotient if quotient.lazy else self.__adopt(quotient)
+
+        if not isinstance(other, (int, float, complex, sp.Basic)):
+            return self / other
+
+        if other == 0:
+            raise ZeroDivisionError("Division by zero.")
+
+        data = self.__buffer()
+        if self.__dtype is not None:
+            data /= self.__scalar(other)
+        else:
+            for offset, value in enumerate(data):
+                data[offset] = value / other
+
+        return self
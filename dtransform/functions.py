@@ -0,0 +1,196 @@
+"""Functions of spectra.
+
+The elementary functions act directly on the coefficients of a spectrum
+by the DTM recurrences of their differential equations, so the result
+keeps the layout of the argument and no symbolic differentiation is
+involved. ``compose`` substitutes spectra into the variables of another
+one. Exact, lazy and numeric spectra are supported alike.
+
+"""
+from collections.abc import Mapping
+from math import isqrt
+from typing import Sequence
+
+import sympy as sp
+
+from . import lazy as _lazy
+from . import series
+from .dtransform import Spectrum, numeric
+
+
+def exp(spectrum: Spectrum) -> Spectrum:
+    """Spectrum of ``exp(f)``."""
+    result, = spectrum._map(
+        lambda f, grid: (series.exp(f, grid),),
+        lambda f, indices: (_lazy.exp(f, indices),),
+        lambda f, indices: (numeric.exp(f, indices),)
+    )
+    return result
+
+
+def log(spectrum: Spectrum) -> Spectrum:
+    """Spectrum of ``log(f)``, which requires a non-zero leading
+    coefficient.
+
+    """
+    result, = spectrum._map(
+        lambda f, grid: (series.log(f, grid),),
+        lambda f, indices: (_lazy.log(f, indices),),
+        lambda f, indices: (numeric.log(f, indices),)
+    )
+    return result
+
+
+def sincos(spectrum: Spectrum) -> tuple[Spectrum, Spectrum]:
+    """Spectra of ``sin(f)`` and ``cos(f)``, computed together at the
+    cost of one of them.
+
+    """
+    return spectrum._map(
+        lambda f, grid: series.sincos(f, grid),
+        lambda f, indices: _lazy.sincos(f, indices),
+        lambda f, indices: numeric.sincos(f, indices)
+    )
+
+
+def sin(spectrum: Spectrum) -> Spectrum:
+    """Spectrum of ``sin(f)``."""
+    return sincos(spectrum)[0]
+
+
+def cos(spectrum: Spectrum) -> Spectrum:
+    """Spectrum of ``cos(f)``."""
+    return sincos(spectrum)[1]
+
+
+def sqrt(spectrum: Spectrum) -> Spectrum:
+    """Spectrum of ``sqrt(f)``, which requires a non-zero leading
+    coefficient.
+
+    """
+    return spectrum ** sp.S.Half
+
+
+def tanh(spectrum: Spectrum) -> Spectrum:
+    """Spectrum of ``tanh(f)``."""
+    result, = spectrum._map(
+        lambda f, grid: (series.tanh(f, grid),),
+        lambda f, indices: (_lazy.tanh(f, indices),),
+        lambda f, indices: (numeric.tanh(f, indices),)
+    )
+    return result
+
+
+def compose(
+    outer: Spectrum,
+    inner_map: Mapping[str | sp.Symbol, Spectrum]
+) -> Spectrum:
+    """Spectrum of ``f(g1, g2, ...)`` in the layout of the inner spectra
+    ``g`` substituted for the variables of the outer spectrum ``f``.
+
+    Every inner spectrum must take the expansion center ``a`` of its outer
+    variable at the inner expansion center, so that the re-centered
+    ``(g - a) / H`` has a zero constant term. Numeric inner spectra only
+    need to match ``a`` up to ``numpy.isclose``, as the constant term of
+    ``g`` itself is subtracted. Coefficients are exact up to an inner
+    total degree below the outer orders, so ``"tensor"`` inner spectra
+    need outer orders covering their total degree.
+
+    The polynomial in the last outer variable is evaluated by the
+    Paterson-Stockmeyer scheme (about ``2 * sqrt(order)`` products of
+    spectra), the other outer variables by Horner's rule.
+
+    """
+    spectra = {str(var): spectrum for var, spectrum in inner_map.items()}
+    if set(spectra) != {str(var) for var in outer.variables}:
+        raise ValueError(
+            "Inner spectra must be given for exactly the outer variables."
+        )
+    if not spectra:
+        raise ValueError("Composition needs at least one inner spectrum.")
+
+    inner = [spectra[str(var)] for var in outer.variables]
+    for spectrum in inner[1:]:
+        inner[0]._check_compatibility(spectrum)
+
+    one = inner[0] ** 0
+    origin = (0,) * len(one.variables)
+    shifted = []
+
+    for var, spectrum in zip(outer.variables, inner):
+        center, constant = outer.center[var], spectrum.coeffs[origin]
+        if spectrum.dtype is not None:
+            matches = numeric.np.isclose(constant, complex(center))
+        else:
+            matches = sp.simplify(constant - center).is_zero
+        if not matches:
+            raise ValueError(
+                f"Inner spectrum for variable '{var}' must equal its"
+                f" expansion center {center} at the inner expansion center."
+            )
+
+        shifted.append(
+            (spectrum - one * constant)
+            * (1 / sp.sympify(outer.scaling[var]))
+        )
+
+    coeffs = outer.coeffs
+    orders = outer.orders
+    powers, giant = _baby_steps(one, shifted[-1], orders[-1])
+
+    def evaluate(prefix: tuple[int, ...]) -> Spectrum:
+        level = len(prefix)
+        if level == len(orders) - 1:
+            return _paterson_stockmeyer(
+                [coeffs.get((*prefix, k), 0) for k in range(orders[-1])],
+                powers,
+                giant
+            )
+
+        result = evaluate((*prefix, orders[level] - 1))
+        for k in reversed(range(orders[level] - 1)):
+            result *= shifted[level]
+            result += evaluate((*prefix, k))
+        return result
+
+    return evaluate(())
+
+
+def _baby_steps(
+    one: Spectrum,
+    spectrum: Spectrum,
+    order: int
+) -> tuple[list[Spectrum], Spectrum | None]:
+    """Powers ``1, t, ..., t ** (m - 1)`` of ``t`` with ``m`` about the
+    square root of ``order`` and the giant step ``t ** m``, ``None`` if
+    the polynomials have no more than ``m`` terms.
+
+    """
+    m = isqrt(order - 1) + 1
+    powers = [one, spectrum][:m]
+    while len(powers) < m:
+        powers.append(powers[-1] * spectrum)
+
+    giant = powers[-1] * spectrum if order > m else None
+    return powers, giant
+
+
+def _paterson_stockmeyer(
+    coeffs: Sequence,
+    powers: Sequence[Spectrum],
+    giant: Spectrum | None
+) -> Spectrum:
+    """Spectrum of ``sum(coeffs[k] * t ** k)`` from the baby steps
+    ``powers`` of ``t`` and the giant step ``t ** len(powers)``: blocks
+    of coefficients are linear combinations of the baby steps, combined
+    by Horner's rule in the giant step.
+
+    """
+    m = len(powers)
+    blocks = [coeffs[i:i + m] for i in range(0, len(coeffs), m)]
+
+    result = Spectrum.linear_combination(zip(blocks[-1], powers))
+    for block in reversed(blocks[:-1]):
+        result *= giant
+        result += Spectrum.linear_combination(zip(block, powers))
+    return result
@@ -0,0 +1,360 @@
+"""Precomputed tables shared by all spectra with the same layout.
+
+A layout is described by the per-variable expansion orders, the truncation
+mode and (for scaling powers) the scaling constants. Tables are built once
+per layout and cached at module level, so the thousands of spectra that
+typically share a layout pay for them only once. Cached values are shared
+and must be treated as read-only.
+
+Coefficients are stored in flat row-major lists (or arrays) covering the
+full grid of indices below ``orders``; ``Grid`` maps multi-indices of a
+layout to offsets in that storage.
+
+"""
+from collections.abc import Mapping
+from fractions import Fraction
+from functools import cached_property, lru_cache
+from itertools import product
+from math import prod
+from types import MappingProxyType
+from typing import Iterator, Sequence
+from weakref import WeakValueDictionary
+
+import sympy as sp
+
+
+TRUNCATIONS = ("tensor", "total")
+
+Index = tuple[int, ...]
+
+
+def degree(idx: Index, orders: tuple[int, ...]) -> Fraction:
+    """Total degree of ``idx`` weighted by per-variable orders."""
+    return sum((Fraction(k, o) for k, o in zip(idx, orders)), Fraction(0))
+
+
+@lru_cache(maxsize=256)
+def multi_indices(
+    orders: tuple[int, ...],
+    truncation: str = "tensor"
+) -> tuple[Index, ...]:
+    """Multi-indices of a spectrum layout in ``product`` order.
+
+    ``"tensor"`` truncation keeps the full grid of indices below
+    ``orders``, ``"total"`` keeps only the indices whose total degree
+    weighted by ``orders`` is below one (``|k| < order`` when all orders
+    are equal).
+
+    """
+    indices = product(*[range(order) for order in orders])
+
+    if truncation == "total":
+        return tuple(idx for idx in indices if degree(idx, orders) < 1)
+
+    return tuple(indices)
+
+
+@lru_cache(maxsize=1 << 16)
+def split(idx: Index) -> tuple[tuple[Index, Index], ...]:
+    """All ``(i, j)`` pairs of multi-indices with ``i + j == idx``
+    (convolution index pairs).
+
+    """
+    return tuple(
+        (i, tuple(k - l for k, l in zip(idx, i)))
+        for i in product(*[range(k + 1) for k in idx])
+    )
+
+
+@lru_cache(maxsize=256)
+def denominators(
+    orders: tuple[int, ...],
+    truncation: str = "tensor"
+) -> Mapping[Index, sp.Integer]:
+    """Factorial denominators ``k1! * ... * kn!`` of a layout."""
+    return MappingProxyType({
+        idx: sp.prod([sp.factorial(k) for k in idx])
+        for idx in multi_indices(orders, truncation)
+    })
+
+
+def scaling_powers(
+    orders: tuple[int, ...],
+    truncation: str,
+    scales: tuple
+) -> Mapping[Index, sp.Expr]:
+    """Scaling constant products ``H1**k1 * ... * Hn**kn`` of a layout.
+
+    Scales of different types (such as ``2`` and ``2.0``) are cached
+    apart, as they give exact and floating point products.
+
+    """
+    return _scaling_powers(
+        orders,
+        truncation,
+        tuple((type(H), H) for H in scales)
+    )
+
+
+@lru_cache(maxsize=256)
+def _scaling_powers(
+    orders: tuple[int, ...],
+    truncation: str,
+    typed_scales: tuple
+) -> Mapping[Index, sp.Expr]:
+    return MappingProxyType({
+        idx: sp.prod([H ** k for (_, H), k in zip(typed_scales, idx) if k])
+        for idx in multi_indices(orders, truncation)
+    })
+
+
+class Grid:
+    """Index set of a layout and its mapping onto flat storage.
+
+    Flat storage holds the index set only, in row-major order, so a
+    "total" layout stores C(n + order - 1, n) coefficients rather than
+    the full tensor grid. Use ``grid()`` to get the instance shared by
+    all spectra of a layout.
+
+    """
+
+    def __init__(self, orders: tuple[int, ...], truncation: str) -> None:
+        self.orders = orders
+        self.truncation = truncation
+        self.indices = multi_indices(orders, truncation)
+        self.size = len(self.indices)
+        self.offsets = tuple(range(self.size))
+
+    def ravel(self, idx: Index) -> int:
+        """Flat storage offset of a multi-index."""
+        return self.lookup[idx]
+
+    def unravel(self, offset: int) -> Index:
+        """Multi-index stored at a flat offset."""
+        return self.indices[offset]
+
+    @cached_property
+    def dense_offsets(self) -> tuple[int, ...]:
+        """Row-major offsets of the index set within the full tensor grid
+        below ``orders``, the layout of dense numeric arrays.
+
+        """
+        strides = tuple(
+            prod(self.orders[n + 1:])
+            for n in range(len(self.orders))
+        )
+        return tuple(
+            sum(k * stride for k, stride in zip(idx, strides))
+            for idx in self.indices
+        )
+
+    def zeros(self) -> list:
+        """Flat storage with all coefficients set to zero."""
+        return [sp.S.Zero] * self.size
+
+    def flatten(self, coeffs: Mapping[Index, sp.Expr]) -> list:
+        """Flat storage of a mapping from multi-indices to coefficients."""
+        data = self.zeros()
+        for idx, offset in zip(self.indices, self.offsets):
+            data[offset] = coeffs.get(idx, sp.S.Zero)
+        return data
+
+    @cached_property
+    def lookup(self) -> dict[Index, int]:
+        """Offsets keyed by multi-index."""
+        return dict(zip(self.indices, self.offsets))
+
+    @cached_property
+    def pairs(self) -> tuple[tuple[tuple[int, int], ...], ...]:
+        """Convolution offset pairs ``(i, j)`` with ``i + j == idx`` for
+        every multi-index of the layout.
+
+        """
+        return tuple(
+            tuple((self.ravel(i), self.ravel(j)) for i, j in split(idx))
+            for idx in self.indices
+        )
+
+    @cached_property
+    def pair_count(self) -> int:
+        """Number of convolution pairs of a dense Cauchy product."""
+        return sum(map(len, self.pairs))
+
+    @cached_property
+    def recurrence(
+        self
+    ) -> tuple[tuple[int, tuple[tuple[int, int, int], ...]], ...]:
+        """Recurrence tables of every multi-index ``idx``: the degree of
+        ``idx`` along its first non-zero axis and the ``(i, j, i_axis)``
+        offset triples of its convolution pairs.
+
+        The zero multi-index has no axis and gets ``(0, ())``.
+
+        """
+        tables = []
+
+        for idx in self.indices:
+            if not any(idx):
+                tables.append((0, ()))
+                continue
+
+            ax = next(n for n, k in enumerate(idx) if k)
+            tables.append((idx[ax], tuple(
+                (self.ravel(i), self.ravel(j), i[ax])
+                for i, j in split(idx)
+            )))
+
+        return tuple(tables)
+
+
+def regrid(data: Sequence, source: Grid, target: Grid) -> list:
+    """Flat storage of ``target`` holding the coefficients of ``data``
+    laid out by ``source``, with zeros at indices missing in ``source``.
+
+    """
+    lookup = source.lookup
+    coeffs = target.zeros()
+    for idx, offset in zip(target.indices, target.offsets):
+        if (i := lookup.get(idx)) is not None:
+            coeffs[offset] = data[i]
+    return coeffs
+
+
+@lru_cache(maxsize=64)
+def grid(orders: tuple[int, ...], truncation: str = "tensor") -> Grid:
+    """Shared ``Grid`` of a layout."""
+    return Grid(orders, truncation)
+
+
+class Coefficients(Mapping):
+    """Read-only mapping view of flat coefficient storage."""
+
+    __slots__ = ('__data', '__grid')
+
+    def __init__(self, data: Sequence, grid: Grid) -> None:
+        self.__data = data
+        self.__grid = grid
+
+    def __getitem__(self, idx: Index) -> sp.Expr:
+        return self.__data[self.__grid.lookup[idx]]
+
+    def __iter__(self) -> Iterator[Index]:
+        return iter(self.__grid.indices)
+
+    def __len__(self) -> int:
+        return len(self.__grid.indices)
+
+    def __repr__(self) -> str:
+        return f"Coefficients({dict(self.items())})"
+
+
+class Layout:
+    """Immutable description of a spectrum layout: variables, per-variable
+    orders, truncation, expansion center and scaling constants.
+
+    Use ``intern()`` to get the instance shared by all spectra of a
+    layout, which makes their compatibility an identity check.
+
+    """
+
+    __slots__ = (
+        'variables',
+        'orders',
+        'truncation',
+        'center',
+        'scaling',
+        'grid',
+        '__weakref__',
+    )
+
+    def __init__(
+        self,
+        variables: tuple,
+        orders: tuple[int, ...],
+        truncation: str,
+        center: Mapping,
+        scaling: Mapping
+    ) -> None:
+        init = super().__setattr__
+        init('variables', variables)
+        init('orders', orders)
+        init('truncation', truncation)
+        init('center', MappingProxyType(dict(center)))
+        init('scaling', MappingProxyType(dict(scaling)))
+        init('grid', grid(orders, truncation))
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("Layouts are immutable")
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Layout):
+            return NotImplemented
+
+        return (
+            self.variables == other.variables
+            and self.orders == other.orders
+            and self.truncation == other.truncation
+            and self.center == other.center
+            and self.scaling == other.scaling
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.variables, self.orders, self.truncation))
+
+    def __reduce__(self) -> tuple:
+        return intern, (
+            self.variables,
+            self.orders,
+            self.truncation,
+            dict(self.center),
+            dict(self.scaling),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Layout(variables={self.variables}, orders={self.orders},"
+            f" truncation='{self.truncation}', center={dict(self.center)},"
+            f" scaling={dict(self.scaling)})"
+        )
+
+
+_layouts: WeakValueDictionary = WeakValueDictionary()
+
+
+def intern(
+    variables: tuple,
+    orders: tuple[int, ...],
+    truncation: str,
+    center: Mapping,
+    scaling: Mapping
+) -> Layout:
+    """Shared ``Layout`` of live spectra with equal variables, orders,
+    truncation, center and scaling (values of different types, such as
+    ``1`` and ``1.0``, are kept apart).
+
+    """
+    key = (
+        variables,
+        orders,
+        truncation,
+        tuple((type(v), v) for v in center.values()),
+        tuple((type(v), v) for v in scaling.values()),
+    )
+
+    try:
+        shared = _layouts.get(key)
+    except TypeError:  # unhashable center or scaling values
+        return Layout(variables, orders, truncation, center, scaling)
+
+    if shared is None:
+        shared = _layouts[key] = Layout(
+            variables,
+            orders,
+            truncation,
+            center,
+            scaling
+        )
+
+    return shared
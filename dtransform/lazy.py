@@ -0,0 +1,382 @@
+"""On-demand spectrum coefficients.
+
+A lazy spectrum holds a ``LazyCoefficients`` mapping instead of a dict.
+Each coefficient is computed on first access and memoized, and arithmetic
+on lazy spectra only composes the recurrences, so nothing is computed
+until a coefficient is actually requested.
+
+"""
+from collections.abc import Mapping
+from itertools import product
+from typing import Callable, Iterator, Sequence
+
+import sympy as sp
+
+from . import layout, series
+from .layout import split
+
+
+class LazyCoefficients(Mapping):
+    """Read-only mapping computing coefficients on first access.
+
+    A ``recurrent`` mapping computes each coefficient from its own lower
+    ones (indices ``<= idx`` in every variable). These are filled in
+    index order before ``idx``, so that the recursion depth does not grow
+    with the order.
+
+    """
+
+    __slots__ = (
+        '__indices', '__index_set', '__compute', '__memo', '__recurrent'
+    )
+
+    def __init__(
+        self,
+        indices: Sequence[tuple[int, ...]],
+        compute: Callable[[tuple[int, ...]], sp.Expr],
+        recurrent: bool = False
+    ) -> None:
+        self.__indices = indices
+        self.__index_set = frozenset(indices)
+        self.__compute = compute
+        self.__memo: dict[tuple[int, ...], sp.Expr] = {}
+        self.__recurrent = recurrent
+
+    def __getitem__(self, idx: tuple[int, ...]) -> sp.Expr:
+        try:
+            return self.__memo[idx]
+        except KeyError:
+            if idx not in self.__index_set:
+                raise
+
+        if self.__recurrent:
+            memo = self.__memo
+            for lower in product(*[range(k + 1) for k in idx]):
+                if lower not in memo:
+                    memo[lower] = self.__compute(lower)
+            return memo[idx]
+
+        value = self.__memo[idx] = self.__compute(idx)
+        return value
+
+    def __iter__(self) -> Iterator[tuple[int, ...]]:
+        return iter(self.__indices)
+
+    def __len__(self) -> int:
+        return len(self.__indices)
+
+    def __repr__(self) -> str:
+        return (
+            f"LazyCoefficients(computed={len(self.__memo)},"
+            f" total={len(self.__indices)})"
+        )
+
+
+def elementwise(
+    fn: Callable[..., sp.Expr],
+    indices: Sequence[tuple[int, ...]],
+    *sources: Mapping
+) -> LazyCoefficients:
+    """Coefficients ``fn(a[idx], b[idx], ...)`` of the source spectra."""
+    return LazyCoefficients(
+        indices,
+        lambda idx: fn(*(source[idx] for source in sources))
+    )
+
+
+def cauchy(
+    a: Mapping,
+    b: Mapping,
+    indices: Sequence[tuple[int, ...]]
+) -> LazyCoefficients:
+    """Lazy Cauchy product (convolution) of two spectra."""
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        val = sp.S.Zero
+        for i, j in split(idx):
+            val += a[i] * b[j]
+        return val
+
+    return LazyCoefficients(indices, compute)
+
+
+def sum_of_products(
+    pairs: Sequence[tuple[Mapping, Mapping]],
+    indices: Sequence[tuple[int, ...]]
+) -> LazyCoefficients:
+    """Lazy sum of the Cauchy products of spectrum pairs."""
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        val = sp.S.Zero
+        for i, j in split(idx):
+            for a, b in pairs:
+                val += a[i] * b[j]
+        return val
+
+    return LazyCoefficients(indices, compute)
+
+
+def quotient(
+    a: Mapping,
+    b: Mapping,
+    indices: Sequence[tuple[int, ...]]
+) -> LazyCoefficients:
+    """Lazy spectrum ``C`` solving ``B * C == A``."""
+    if (zeros_coeff := b[indices[0]]) == 0:
+        raise ZeroDivisionError(
+            "Leading coefficient of denominator is zero."
+        )
+
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        val = a[idx]
+        for i, j in split(idx):
+            if j != idx:
+                val -= b[i] * coeffs[j]
+        return val / zeros_coeff
+
+    coeffs = LazyCoefficients(indices, compute, recurrent=True)
+    return coeffs
+
+
+def power(
+    f: Mapping,
+    alpha: sp.Expr,
+    indices: Sequence[tuple[int, ...]]
+) -> LazyCoefficients:
+    """Lazy spectrum of ``f ** alpha`` for a constant exponent, which
+    requires a non-zero leading coefficient of ``f``.
+
+    """
+    if (f0 := f[indices[0]]) == 0:
+        raise ValueError(
+            "Leading coefficient must be non-zero for non-integer powers."
+        )
+
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        if not any(idx):
+            return sp.Pow(f0, alpha)
+
+        ax = next(n for n, k in enumerate(idx) if k)
+        val = sp.S.Zero
+        for i, j in split(idx):
+            if any(i):
+                val += (alpha * i[ax] - j[ax]) * f[i] * coeffs[j]
+        return val / (idx[ax] * f0)
+
+    coeffs = LazyCoefficients(indices, compute, recurrent=True)
+    return coeffs
+
+
+def exp(f: Mapping, indices: Sequence[tuple[int, ...]]) -> LazyCoefficients:
+    """Lazy spectrum of ``exp(f)``."""
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        if not any(idx):
+            return sp.exp(f[idx])
+
+        ax = next(n for n, k in enumerate(idx) if k)
+        val = sp.S.Zero
+        for i, j in split(idx):
+            if i[ax]:
+                val += i[ax] * f[i] * coeffs[j]
+        return val / idx[ax]
+
+    coeffs = LazyCoefficients(indices, compute, recurrent=True)
+    return coeffs
+
+
+def log(f: Mapping, indices: Sequence[tuple[int, ...]]) -> LazyCoefficients:
+    """Lazy spectrum of ``log(f)``, which requires a non-zero leading
+    coefficient of ``f``.
+
+    """
+    if (f0 := f[indices[0]]) == 0:
+        raise ValueError("Logarithm of a spectrum with zero leading term.")
+
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        if not any(idx):
+            return sp.log(f0)
+
+        ax = next(n for n, k in enumerate(idx) if k)
+        val = idx[ax] * f[idx]
+        for i, j in split(idx):
+            if i[ax] and i != idx:
+                val -= i[ax] * coeffs[i] * f[j]
+        return val / (idx[ax] * f0)
+
+    coeffs = LazyCoefficients(indices, compute, recurrent=True)
+    return coeffs
+
+
+def sincos(
+    f: Mapping,
+    indices: Sequence[tuple[int, ...]]
+) -> tuple[LazyCoefficients, LazyCoefficients]:
+    """Lazy spectra of ``sin(f)`` and ``cos(f)``, sharing memoized
+    coefficients.
+
+    """
+    def integral(idx: tuple[int, ...], other: Mapping) -> sp.Expr:
+        ax = next(n for n, k in enumerate(idx) if k)
+        val = sp.S.Zero
+        for i, j in split(idx):
+            if i[ax]:
+                val += i[ax] * f[i] * other[j]
+        return val / idx[ax]
+
+    def compute_sin(idx: tuple[int, ...]) -> sp.Expr:
+        return integral(idx, cos) if any(idx) else sp.sin(f[idx])
+
+    def compute_cos(idx: tuple[int, ...]) -> sp.Expr:
+        return -integral(idx, sin) if any(idx) else sp.cos(f[idx])
+
+    sin = LazyCoefficients(indices, compute_sin, recurrent=True)
+    cos = LazyCoefficients(indices, compute_cos, recurrent=True)
+    return sin, cos
+
+
+def tanh(f: Mapping, indices: Sequence[tuple[int, ...]]) -> LazyCoefficients:
+    """Lazy spectrum of ``tanh(f)``."""
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        if not any(idx):
+            return sp.tanh(f[idx])
+
+        ax = next(n for n, k in enumerate(idx) if k)
+        val = sp.S.Zero
+        for i, j in split(idx):
+            if i[ax]:
+                val += i[ax] * f[i] * sech2[j]
+        return val / idx[ax]
+
+    def compute_sech2(idx: tuple[int, ...]) -> sp.Expr:
+        if not any(idx):
+            return 1 - coeffs[idx] ** 2
+
+        val = sp.S.Zero
+        for i, j in split(idx):
+            val -= coeffs[i] * coeffs[j]
+        return val
+
+    coeffs = LazyCoefficients(indices, compute, recurrent=True)
+    sech2 = LazyCoefficients(indices, compute_sech2, recurrent=True)
+    return coeffs
+
+
+def derivative(
+    f: Mapping,
+    axis: int,
+    n: int,
+    scale: sp.Expr,
+    indices: Sequence[tuple[int, ...]]
+) -> LazyCoefficients:
+    """Lazy spectrum of the ``n``-th partial derivative along ``axis``."""
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        shifted = (*idx[:axis], idx[axis] + n, *idx[axis + 1:])
+        return (
+            sp.rf(idx[axis] + 1, n) * f.get(shifted, sp.S.Zero) / scale ** n
+        )
+
+    return LazyCoefficients(indices, compute)
+
+
+def integral(
+    f: Mapping,
+    axis: int,
+    scale: sp.Expr,
+    constant: sp.Expr,
+    indices: Sequence[tuple[int, ...]]
+) -> LazyCoefficients:
+    """Lazy spectrum of the antiderivative along ``axis`` with value
+    ``constant`` at the expansion center.
+
+    """
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        if not idx[axis]:
+            return sp.S.Zero if any(idx) else constant
+
+        shifted = (*idx[:axis], idx[axis] - 1, *idx[axis + 1:])
+        return f[shifted] * scale / idx[axis]
+
+    return LazyCoefficients(indices, compute)
+
+
+def revert(
+    f: Mapping,
+    center: sp.Expr,
+    scale: sp.Expr,
+    indices: Sequence[tuple[int, ...]]
+) -> LazyCoefficients:
+    """Lazy univariate spectrum of the inverse function of ``f`` around
+    ``f[0]``, mapping it back to ``center``, with the same ``scale``.
+
+    """
+    t: dict[int, sp.Expr] = {}
+    # coefficient m of ((g - center) / scale) ** j keyed by (j, m)
+    powers: dict[tuple[int, int], sp.Expr] = {}
+
+    def power(j: int, m: int) -> sp.Expr:
+        if m < j:
+            return sp.S.Zero
+        return t[m] if j == 1 else powers[j, m]
+
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        m, = idx
+        if not m:
+            return sp.sympify(center)
+
+        # lower coefficients, hence t[1], ..., t[m - 1], are filled first
+        val = scale if m == 1 else sp.S.Zero
+        for j in range(2, m + 1):
+            powers[j, m] = sum(
+                (t[i] * power(j - 1, m - i) for i in range(1, m - j + 2)),
+                sp.S.Zero
+            )
+            val -= f[(j,)] * powers[j, m]
+
+        t[m] = val / f[(1,)]
+        return scale * t[m]
+
+    return LazyCoefficients(indices, compute, recurrent=True)
+
+
+def diff_coeffs(
+    expr: sp.Expr,
+    variables: tuple,
+    at_center: Callable[[sp.Expr], sp.Expr],
+    scaling: dict,
+    orders: tuple[int, ...],
+    truncation: str = "tensor"
+) -> LazyCoefficients:
+    """Lazy counterpart of symbolic differentiation.
+
+    Each derivative is obtained by a single differentiation of its
+    memoized parent, in the same variable order as the eager path, and
+    evaluated by ``at_center`` into the form of ``series.canonical``.
+
+    """
+    derivs = {(0,) * len(variables): expr}
+    denoms = layout.denominators(orders, truncation)
+    powers = layout.scaling_powers(
+        orders,
+        truncation,
+        tuple(scaling[var] for var in variables)
+    )
+
+    def derivative(idx: tuple[int, ...]) -> sp.Expr:
+        # walk up to the nearest memoized ancestor, then differentiate
+        # back down the chain
+        chain = []
+        while idx not in derivs:
+            ax = max(n for n, k in enumerate(idx) if k)
+            chain.append((idx, ax))
+            idx = (*idx[:ax], idx[ax] - 1, *idx[ax + 1:])
+
+        for child, ax in reversed(chain):
+            derivs[child] = sp.diff(derivs[idx], variables[ax])
+            idx = child
+
+        return derivs[idx]
+
+    def compute(idx: tuple[int, ...]) -> sp.Expr:
+        return series.canonical(
+            at_center(derivative(idx)) * powers[idx] / denoms[idx]
+        )
+
+    return LazyCoefficients(layout.multi_indices(orders, truncation), compute)
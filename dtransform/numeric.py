@@ -0,0 +1,524 @@
+"""NumPy kernels for spectra with numeric coefficients.
+
+Coefficients are stored in dense arrays of shape ``orders``. Entries
+outside of the spectrum index set (for ``"total"`` truncation) are kept at
+zero, which every kernel here preserves. Arrays may stack several spectra
+along leading axes, the spectrum axes being the trailing ``ndim`` ones.
+
+"""
+from functools import lru_cache
+from math import lcm, prod
+from typing import Iterator, Sequence
+
+import numpy as np
+
+
+# number of coefficients from which products use FFT convolution, below it
+# the direct convolution is faster
+FFT_THRESHOLD = 32
+
+# number of coefficients from which division is faster as a product with
+# the Newton reciprocal of the denominator
+NEWTON_THRESHOLD = 256
+
+# number of non-zero coefficients up to which products of large spectra
+# still use the direct convolution
+SPARSE_THRESHOLD = 8
+
+
+@lru_cache(maxsize=256)
+def mask(shape: tuple[int, ...], truncation: str) -> np.ndarray | None:
+    """Boolean mask of the index set, ``None`` for the full grid.
+
+    The cached mask is shared and must not be modified.
+
+    """
+    if truncation != "total" or not shape:
+        return None
+
+    # weighted total degree sum(k / order) < 1 in integer arithmetic
+    common = lcm(*shape)
+    degree = sum(
+        grid * (common // order)
+        for grid, order in zip(np.indices(shape), shape)
+    )
+    return degree < common
+
+
+def from_flat(
+    data: Sequence,
+    shape: tuple[int, ...],
+    offsets: Sequence[int],
+    dtype: np.dtype
+) -> np.ndarray:
+    """Dense array of flat coefficient storage, placing each coefficient
+    at its row-major offset ``offsets`` within ``shape``.
+
+    """
+    convert = complex if dtype.kind == 'c' else float
+    array = np.zeros(prod(shape), dtype=dtype)
+    array[list(offsets)] = [convert(val) for val in data]
+    return array.reshape(shape)
+
+
+def readonly(a: np.ndarray) -> np.ndarray:
+    """Read-only view of an array, for exposing shared storage."""
+    view = a.view()
+    view.setflags(write=False)
+    return view
+
+
+def convolve(
+    a: np.ndarray,
+    b: np.ndarray,
+    index_mask: np.ndarray | None = None,
+    ndim: int | None = None
+) -> np.ndarray:
+    """Truncated Cauchy product, by FFT for large spectra and by shifted
+    array updates for small or sparse ones.
+
+    """
+    return sum_of_products([(a, b)], index_mask, ndim)
+
+
+def sum_of_products(
+    pairs: Sequence[tuple[np.ndarray, np.ndarray]],
+    index_mask: np.ndarray | None = None,
+    ndim: int | None = None
+) -> np.ndarray:
+    """Sum of truncated Cauchy products of array pairs.
+
+    Small or sparse products are accumulated into a single array by the
+    direct convolution, large dense ones are summed in the frequency
+    domain and share a single inverse FFT.
+
+    """
+    result, dense = None, []
+
+    for a, b in pairs:
+        _ndim = a.ndim if ndim is None else ndim
+
+        # the sparser factor drives the direct convolution
+        nonzero = np.count_nonzero(_support(a, _ndim))
+        if np.count_nonzero(_support(b, _ndim)) < nonzero:
+            a, b = b, a
+            nonzero = np.count_nonzero(_support(a, _ndim))
+
+        if (
+            prod(a.shape[a.ndim - _ndim:]) >= FFT_THRESHOLD
+            and nonzero > SPARSE_THRESHOLD
+        ):
+            dense.append((a, b))
+        else:
+            result = direct_convolve(a, b, result, _ndim)
+
+    if dense:
+        product = fft_convolve(dense, ndim)
+        result = product if result is None else result + product
+
+    if index_mask is not None:
+        result[..., ~index_mask] = 0
+
+    return result
+
+
+def fft_convolve(
+    pairs: Sequence[tuple[np.ndarray, np.ndarray]],
+    ndim: int | None = None
+) -> np.ndarray:
+    """Sum of Cauchy products of array pairs truncated to their shape by
+    zero-padded n-dimensional FFT convolution.
+
+    """
+    a = pairs[0][0]
+    ndim = a.ndim if ndim is None else ndim
+    shape = a.shape[a.ndim - ndim:]
+    full = tuple(2 * n - 1 for n in shape)
+    axes = tuple(range(-ndim, 0))
+    window = (..., *(slice(0, n) for n in shape))
+    dtype = np.result_type(*(array for pair in pairs for array in pair))
+
+    if dtype.kind == 'c':
+        forward, backward = np.fft.fftn, np.fft.ifftn
+    else:
+        forward, backward = np.fft.rfftn, np.fft.irfftn
+
+    spectrum = sum(
+        forward(a, full, axes) * forward(b, full, axes)
+        for a, b in pairs
+    )
+
+    return np.ascontiguousarray(
+        backward(spectrum, full, axes)[window],
+        dtype=dtype
+    )
+
+
+def direct_convolve(
+    a: np.ndarray,
+    b: np.ndarray,
+    out: np.ndarray | None = None,
+    ndim: int | None = None
+) -> np.ndarray:
+    """Truncated Cauchy product computed by shifted array updates, one per
+    non-zero coefficient of ``a``, added to ``out`` if given.
+
+    """
+    ndim = a.ndim if ndim is None else ndim
+    shape = a.shape[a.ndim - ndim:]
+    if out is None:
+        out = np.zeros(
+            np.broadcast_shapes(a.shape, b.shape),
+            dtype=np.result_type(a, b)
+        )
+
+    # ``argwhere`` also yields the empty index of constant (0-d) spectra
+    for idx in map(tuple, np.argwhere(_support(a, ndim))):
+        out[(..., *(slice(k, None) for k in idx))] += a[
+            (..., *idx, *(None,) * ndim)
+        ] * b[(..., *(slice(0, n - k) for n, k in zip(shape, idx)))]
+
+    return out
+
+
+def _support(a: np.ndarray, ndim: int) -> np.ndarray:
+    """Indices of the trailing ``ndim`` axes with non-zero coefficients in
+    any of the arrays stacked along the leading axes.
+
+    """
+    return np.any(a, axis=tuple(range(a.ndim - ndim))) if a.ndim > ndim else a
+
+
+def linear_combination(
+    terms: Sequence[tuple[float | complex, np.ndarray]]
+) -> np.ndarray:
+    """Sum of scaled arrays accumulated into a single array."""
+    (weight, array), *rest = terms
+    result = array * weight
+    scratch = np.empty_like(result)
+
+    for weight, array in rest:
+        result += np.multiply(array, weight, out=scratch)
+
+    return result
+
+
+def deconvolve(
+    a: np.ndarray,
+    b: np.ndarray,
+    indices: Sequence[tuple]
+) -> np.ndarray:
+    """Array ``c`` solving ``b * c == a`` by the triangular recurrence.
+
+    The multi-``indices`` address the trailing axes, leading axes stack
+    independent spectra.
+
+    """
+    ndim = len(indices[0])
+    axes = tuple(range(-ndim, 0))
+
+    zeros_coeff = b[(..., *(0,) * ndim)]
+    if np.any(zeros_coeff == 0):
+        raise ZeroDivisionError(
+            "Leading coefficient of denominator is zero."
+        )
+
+    result = np.zeros(
+        np.broadcast_shapes(a.shape, b.shape),
+        dtype=np.result_type(a, b)
+    )
+
+    flip = (..., *(slice(None, None, -1),) * ndim)
+    if result.ndim == ndim:
+        axes = None
+
+    for idx in indices:
+        window = (..., *(slice(0, k + 1) for k in idx))
+        # result[idx] is still zero, so the i == 0 term does not contribute
+        val = a[(..., *idx)] - np.sum(
+            b[window] * result[window][flip],
+            axis=axes
+        )
+        result[(..., *idx)] = val / zeros_coeff
+
+    return result
+
+
+def reciprocal(
+    b: np.ndarray,
+    index_mask: np.ndarray | None = None,
+    ndim: int | None = None
+) -> np.ndarray:
+    """Array of ``1 / b`` by Newton iteration ``g <- g * (2 - b * g)``.
+
+    Every step doubles the total degree up to which ``g`` is exact and
+    works on the smallest leading block of the array holding those
+    indices.
+
+    """
+    ndim = b.ndim if ndim is None else ndim
+    batch, shape = b.shape[:b.ndim - ndim], b.shape[b.ndim - ndim:]
+    origin = (..., *(0,) * ndim)
+
+    zeros_coeff = b[origin]
+    if np.any(zeros_coeff == 0):
+        raise ZeroDivisionError(
+            "Leading coefficient of denominator is zero."
+        )
+
+    if index_mask is None:
+        degree = sum(n - 1 for n in shape)
+    else:
+        degree = int(sum(np.indices(shape))[index_mask].max())
+
+    result = np.reshape(1 / zeros_coeff, batch + (1,) * ndim).astype(b.dtype)
+    precision = 1
+
+    while precision <= degree:
+        precision *= 2
+        block = tuple(min(n, precision) for n in shape)
+        result = np.pad(result, [(0, 0)] * len(batch) + [
+            (0, n - k) for n, k in zip(block, result.shape[len(batch):])
+        ])
+
+        residual = -convolve(
+            b[(..., *(slice(0, n) for n in block))],
+            result,
+            ndim=ndim
+        )
+        residual[origin] += 1
+        result += convolve(result, residual, ndim=ndim)
+
+        # drop the inexact terms, they would only spoil the FFT precision
+        result[..., sum(np.indices(block)) >= precision] = 0
+
+    if index_mask is not None:
+        result[..., ~index_mask] = 0
+
+    return result
+
+
+def _recurrence(
+    indices: Sequence[tuple]
+) -> Iterator[tuple[tuple, tuple, int, np.ndarray]]:
+    """Recurrence terms of every non-zero multi-index ``idx``: ``idx``,
+    the window of its sub-indices, its degree ``k`` along its first
+    non-zero axis and the degrees along that axis over the window.
+
+    """
+    ndim = len(indices[0])
+
+    for idx in indices[1:]:
+        ax = next(n for n, k in enumerate(idx) if k)
+        k = idx[ax]
+        window = (..., *(slice(0, k + 1) for k in idx))
+        i_ax = np.arange(k + 1).reshape((-1,) + (1,) * (ndim - ax - 1))
+        yield idx, window, k, i_ax
+
+
+def _axes(f: np.ndarray, ndim: int) -> tuple[int, ...] | None:
+    """Spectrum axes summed over by the recurrences, ``None`` (all axes)
+    for a single spectrum.
+
+    """
+    return None if f.ndim == ndim else tuple(range(-ndim, 0))
+
+
+def power(
+    f: np.ndarray,
+    alpha: float | complex,
+    indices: Sequence[tuple]
+) -> np.ndarray:
+    """Array of ``f ** alpha`` by the recurrence of
+    ``f * D(g) == alpha * D(f) * g`` along the first non-zero axis of
+    every multi-index.
+
+    """
+    ndim = len(indices[0])
+    origin = (..., *(0,) * ndim)
+
+    zeros_coeff = f[origin]
+    if np.any(zeros_coeff == 0):
+        raise ValueError(
+            "Leading coefficient must be non-zero for non-integer powers."
+        )
+
+    result = np.zeros(f.shape, dtype=np.result_type(f, alpha))
+    result[origin] = zeros_coeff ** alpha
+    flip = (..., *(slice(None, None, -1),) * ndim)
+    axes = _axes(f, ndim)
+
+    for idx, window, k, i_ax in _recurrence(indices):
+        # the i == 0 term vanishes as result[idx] is still zero
+        val = np.sum(
+            (alpha * i_ax - (k - i_ax)) * f[window] * result[window][flip],
+            axis=axes
+        )
+        result[(..., *idx)] = val / (k * zeros_coeff)
+
+    return result
+
+
+def exp(f: np.ndarray, indices: Sequence[tuple]) -> np.ndarray:
+    """Array of ``exp(f)`` from ``D(g) == D(f) * g``."""
+    ndim = len(indices[0])
+    flip = (..., *(slice(None, None, -1),) * ndim)
+    axes = _axes(f, ndim)
+
+    result = np.zeros_like(f)
+    result[(..., *(0,) * ndim)] = np.exp(f[(..., *(0,) * ndim)])
+
+    for idx, window, k, i_ax in _recurrence(indices):
+        val = np.sum(i_ax * f[window] * result[window][flip], axis=axes)
+        result[(..., *idx)] = val / k
+
+    return result
+
+
+def log(f: np.ndarray, indices: Sequence[tuple]) -> np.ndarray:
+    """Array of ``log(f)`` from ``f * D(g) == D(f)``."""
+    ndim = len(indices[0])
+    origin = (..., *(0,) * ndim)
+    flip = (..., *(slice(None, None, -1),) * ndim)
+    axes = _axes(f, ndim)
+
+    zeros_coeff = f[origin]
+    if np.any(zeros_coeff == 0):
+        raise ValueError("Logarithm of a spectrum with zero leading term.")
+
+    result = np.zeros_like(f)
+    result[origin] = np.log(zeros_coeff)
+
+    for idx, window, k, i_ax in _recurrence(indices):
+        # result[idx] is still zero, so the i == idx term does not count
+        val = k * f[(..., *idx)] - np.sum(
+            i_ax * result[window] * f[window][flip],
+            axis=axes
+        )
+        result[(..., *idx)] = val / (k * zeros_coeff)
+
+    return result
+
+
+def sincos(
+    f: np.ndarray,
+    indices: Sequence[tuple]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Arrays of ``sin(f)`` and ``cos(f)``, computed together."""
+    ndim = len(indices[0])
+    origin = (..., *(0,) * ndim)
+    flip = (..., *(slice(None, None, -1),) * ndim)
+    axes = _axes(f, ndim)
+
+    sin, cos = np.zeros_like(f), np.zeros_like(f)
+    sin[origin], cos[origin] = np.sin(f[origin]), np.cos(f[origin])
+
+    for idx, window, k, i_ax in _recurrence(indices):
+        df = i_ax * f[window]
+        sin[(..., *idx)] = np.sum(df * cos[window][flip], axis=axes) / k
+        cos[(..., *idx)] = -np.sum(df * sin[window][flip], axis=axes) / k
+
+    return sin, cos
+
+
+def tanh(f: np.ndarray, indices: Sequence[tuple]) -> np.ndarray:
+    """Array of ``tanh(f)`` from ``D(g) == D(f) * (1 - g ** 2)``, with
+    ``1 - g ** 2`` carried along.
+
+    """
+    ndim = len(indices[0])
+    origin = (..., *(0,) * ndim)
+    flip = (..., *(slice(None, None, -1),) * ndim)
+    axes = _axes(f, ndim)
+
+    result, sech2 = np.zeros_like(f), np.zeros_like(f)
+    result[origin] = np.tanh(f[origin])
+    sech2[origin] = 1 - result[origin] ** 2
+
+    for idx, window, k, i_ax in _recurrence(indices):
+        val = np.sum(i_ax * f[window] * sech2[window][flip], axis=axes)
+        result[(..., *idx)] = val / k
+        sech2[(..., *idx)] = -np.sum(
+            result[window] * result[window][flip],
+            axis=axes
+        )
+
+    return result
+
+
+def derivative(
+    f: np.ndarray,
+    axis: int,
+    n: int,
+    scale: float | complex
+) -> np.ndarray:
+    """Array of the ``n``-th partial derivative along ``axis``."""
+    result = np.zeros_like(f)
+    size = f.shape[axis]
+    if n >= size:
+        return result
+
+    weights = np.ones(size - n)
+    for j in range(1, n + 1):
+        weights *= np.arange(j, size - n + j)
+
+    head = (slice(None),) * axis
+    shape = (-1,) + (1,) * (f.ndim - axis - 1)
+    result[(*head, slice(0, size - n))] = f[(*head, slice(n, None))] * (
+        weights / scale ** n
+    ).reshape(shape)
+
+    return result
+
+
+def integral(
+    f: np.ndarray,
+    axis: int,
+    scale: float | complex,
+    constant: float | complex,
+    index_mask: np.ndarray | None = None
+) -> np.ndarray:
+    """Array of the antiderivative along ``axis`` with value
+    ``constant`` at the expansion center.
+
+    """
+    result = np.zeros_like(f)
+    size = f.shape[axis]
+
+    head = (slice(None),) * axis
+    shape = (-1,) + (1,) * (f.ndim - axis - 1)
+    result[(*head, slice(1, None))] = f[(*head, slice(0, size - 1))] * (
+        scale / np.arange(1, size)
+    ).reshape(shape)
+
+    if index_mask is not None:
+        result[..., ~index_mask] = 0
+    result[(0,) * f.ndim] = constant
+
+    return result
+
+
+def revert(
+    f: np.ndarray,
+    center: float | complex,
+    scale: float | complex
+) -> np.ndarray:
+    """Univariate array of the inverse function of ``f`` around ``f[0]``,
+    mapping it back to ``center``, with the same ``scale``, by the power
+    table recurrence of ``series.revert``.
+
+    """
+    n = f.shape[0]
+    t = np.zeros_like(f)
+    # powers[j, m] is coefficient m of t ** j
+    powers = np.zeros((n, n), dtype=f.dtype)
+
+    for m in range(1, n):
+        # terms with i > m - j + 1 vanish as t ** (j - 1) starts at j - 1
+        powers[2:m + 1, m] = powers[1:m, m - 1:0:-1] @ t[1:m]
+        val = (scale if m == 1 else 0) - f[2:m + 1] @ powers[2:m + 1, m]
+        t[m] = powers[1, m] = val / f[1]
+
+    result = scale * t
+    result[0] = center
+    return result
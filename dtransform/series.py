@@ -0,0 +1,648 @@
+"""Coefficient recurrences of the differential transform method.
+
+Spectra are handled here as flat coefficient lists laid out by a
+``layout.Grid``, whose multi-indices are enumerated in ``product`` order,
+so every multi-index is visited after all of its sub-indices.
+
+"""
+from functools import reduce
+from math import lcm, prod
+from operator import add, le, sub
+from typing import Callable
+
+import sympy as sp
+
+from . import layout
+from .layout import Grid
+
+
+Coeffs = list
+
+# number of coefficients from which exact division is faster as a product
+# with the Newton reciprocal of the denominator
+NEWTON_THRESHOLD = 32
+
+
+def cauchy(a: Coeffs, b: Coeffs, grid: Grid) -> Coeffs:
+    """Cauchy product (convolution) of two spectra.
+
+    Sparse spectra are multiplied by ``sparse_cauchy`` and spectra with
+    only rational coefficients exactly by ``kronecker_cauchy``.
+
+    """
+    a_support, b_support = support(a, grid), support(b, grid)
+    if len(a_support) * len(b_support) < grid.pair_count // 4:
+        return sparse_cauchy(a, b, grid, a_support, b_support)
+
+    if is_rational(a) and is_rational(b):
+        return kronecker_cauchy(a, b, grid)
+
+    coeffs = grid.zeros()
+
+    for offset, pairs in zip(grid.offsets, grid.pairs):
+        val = sp.S.Zero
+        for i, j in pairs:
+            val += a[i] * b[j]
+        coeffs[offset] = val
+
+    return coeffs
+
+
+def sum_of_products(
+    pairs: list[tuple[Coeffs, Coeffs]],
+    grid: Grid
+) -> Coeffs:
+    """Sum of the Cauchy products of spectrum pairs.
+
+    Sparse products are accumulated by ``sparse_cauchy``, rational ones
+    share a single packed integer sum in ``kronecker_dot``, and all the
+    others are summed in one pass over the convolution pairs.
+
+    """
+    partial, rational, dense = [], [], []
+
+    for a, b in pairs:
+        a_support, b_support = support(a, grid), support(b, grid)
+        if len(a_support) * len(b_support) < grid.pair_count // 4:
+            partial.append(sparse_cauchy(a, b, grid, a_support, b_support))
+        elif is_rational(a) and is_rational(b):
+            rational.append((a, b))
+        else:
+            dense.append((a, b))
+
+    if rational:
+        partial.append(kronecker_dot(rational, grid))
+
+    if dense:
+        coeffs = grid.zeros()
+        for offset, index_pairs in zip(grid.offsets, grid.pairs):
+            val = sp.S.Zero
+            for a, b in dense:
+                for i, j in index_pairs:
+                    val += a[i] * b[j]
+            coeffs[offset] = val
+        partial.append(coeffs)
+
+    return [sum(terms, sp.S.Zero) for terms in zip(*partial)]
+
+
+def linear_combination(terms: list[tuple[sp.Expr, Coeffs]]) -> Coeffs:
+    """Coefficients of ``w1 * f1 + w2 * f2 + ...`` in a single pass."""
+    zero = sp.S.Zero
+    weights = [weight for weight, _ in terms]
+    coeffs = []
+
+    for values in zip(*(f for _, f in terms)):
+        val = zero
+        for weight, v in zip(weights, values):
+            if v is not zero:
+                val += weight * v
+        coeffs.append(val)
+
+    return coeffs
+
+
+def is_rational(f: Coeffs) -> bool:
+    """Whether all coefficients of a spectrum are rational numbers."""
+    return all(isinstance(v, sp.Rational) for v in f)
+
+
+def support(f: Coeffs, grid: Grid) -> tuple[int, ...]:
+    """Offsets of the coefficients of a spectrum which are not
+    structurally zero (the ``sp.S.Zero`` singleton).
+
+    """
+    zero = sp.S.Zero
+    return tuple(offset for offset in grid.offsets if f[offset] is not zero)
+
+
+def sparse_cauchy(
+    a: Coeffs,
+    b: Coeffs,
+    grid: Grid,
+    a_support: tuple[int, ...],
+    b_support: tuple[int, ...]
+) -> Coeffs:
+    """Cauchy product iterating only over pairs of non-zero coefficients
+    given by the supports of both spectra.
+
+    """
+    coeffs = grid.zeros()
+    lookup = grid.lookup
+    b_terms = [(grid.unravel(j), b[j]) for j in b_support]
+
+    for i in a_support:
+        idx, a_val = grid.unravel(i), a[i]
+        for j_idx, b_val in b_terms:
+            offset = lookup.get(tuple(map(add, idx, j_idx)))
+            if offset is not None:
+                coeffs[offset] += a_val * b_val
+
+    return coeffs
+
+
+def kronecker_cauchy(a: Coeffs, b: Coeffs, grid: Grid) -> Coeffs:
+    """Exact Cauchy product of two spectra with rational coefficients."""
+    return kronecker_dot([(a, b)], grid)
+
+
+def kronecker_dot(
+    pairs: list[tuple[Coeffs, Coeffs]],
+    grid: Grid
+) -> Coeffs:
+    """Exact sum of the Cauchy products of spectrum pairs with rational
+    coefficients.
+
+    The coefficient grids are packed into univariate polynomials by
+    Kronecker substitution, with every variable given room for the
+    ``2 * order - 1`` exponents of the full product. After clearing the
+    denominators, the polynomials are evaluated at a power of two large
+    enough to hold every coefficient of the result, so that every
+    convolution is a single multiplication of Python integers and the
+    products are summed before being unpacked once.
+
+    """
+    spans = [2 * order - 1 for order in grid.orders]
+    weights = [prod(spans[n + 1:]) for n in range(len(spans))]
+    exponents = [
+        sum(k * w for k, w in zip(idx, weights))
+        for idx in grid.indices
+    ]
+
+    def integers(f: Coeffs) -> tuple[list[int], int]:
+        f_denom = lcm(*(f[offset].q for offset in grid.offsets))
+        return [f[i].p * (f_denom // f[i].q) for i in grid.offsets], f_denom
+
+    products = []
+    for a, b in pairs:
+        (a_ints, a_denom), (b_ints, b_denom) = integers(a), integers(b)
+        products.append((a_ints, b_ints, a_denom * b_denom))
+
+    # common denominator and slot width holding any result coefficient
+    # as a signed digit
+    denom = lcm(*(d for _, _, d in products))
+    bound = len(exponents) * sum(
+        max(map(abs, a_ints)) * max(map(abs, b_ints)) * (denom // d)
+        for a_ints, b_ints, d in products
+    )
+    nbytes = (bound.bit_length() + 9) // 8
+    bits = 8 * nbytes
+
+    def pack(ints: list[int]) -> int:
+        return sum(v << (bits * e) for v, e in zip(ints, exponents) if v)
+
+    packed = sum(
+        pack(a_ints) * pack(b_ints) * (denom // d)
+        for a_ints, b_ints, d in products
+    )
+    sign = -1 if packed < 0 else 1
+    length = nbytes * (max(exponents) + 1)
+    raw = abs(packed).to_bytes(
+        max(length, (packed.bit_length() + 7) // 8),
+        "little"
+    )
+
+    # balanced base ``2 ** bits`` digits of the truncated packed product
+    digits = []
+    half, full, carry = 1 << (bits - 1), 1 << bits, 0
+    for start in range(0, length, nbytes):
+        digit = int.from_bytes(raw[start:start + nbytes], "little") + carry
+        carry = digit >= half
+        digits.append(digit - full if carry else digit)
+
+    coeffs = grid.zeros()
+    for offset, e in zip(grid.offsets, exponents):
+        coeffs[offset] = sp.Rational(sign * digits[e], denom)
+
+    return coeffs
+
+
+def quotient(a: Coeffs, b: Coeffs, grid: Grid) -> Coeffs:
+    """Spectrum ``C`` solving ``B * C == A`` by the triangular recurrence.
+
+    Only the non-zero coefficients of a sparse ``B`` enter the recurrence.
+
+    """
+    coeffs = grid.zeros()
+
+    if (zeros_coeff := b[0]) == 0:
+        raise ZeroDivisionError(
+            "Leading coefficient of denominator is zero."
+        )
+
+    b_support = support(b, grid)[1:]
+    if is_sparse_denominator(b_support, grid):
+        return sparse_quotient(a, b, grid, b_support)
+
+    for offset, pairs in zip(grid.offsets, grid.pairs):
+        val = a[offset]
+
+        for i, j in pairs:
+            if j != offset:
+                val -= b[i] * coeffs[j]
+
+        coeffs[offset] = val / zeros_coeff
+
+    return coeffs
+
+
+def is_sparse_denominator(b_support: tuple[int, ...], grid: Grid) -> bool:
+    """Whether a denominator with non-zero higher order coefficients at
+    ``b_support`` is better handled by ``sparse_quotient``.
+
+    """
+    return len(b_support) * len(grid.indices) < grid.pair_count // 4
+
+
+def prefers_reciprocal(b: Coeffs, grid: Grid) -> bool:
+    """Whether dividing by ``b`` is faster as a product with
+    ``reciprocal(b)`` than by the triangular recurrence of ``quotient``.
+
+    That holds for large dense denominators with rational coefficients on
+    tensor grids, where the Newton steps run on ``kronecker_cauchy``.
+
+    """
+    return (
+        grid.truncation == "tensor"
+        and grid.size >= NEWTON_THRESHOLD
+        and is_rational(b)
+        and not is_sparse_denominator(support(b, grid)[1:], grid)
+    )
+
+
+def sparse_quotient(
+    a: Coeffs,
+    b: Coeffs,
+    grid: Grid,
+    b_support: tuple[int, ...]
+) -> Coeffs:
+    """Triangular recurrence of ``quotient`` restricted to the non-zero
+    higher order coefficients ``b_support`` of the denominator.
+
+    """
+    coeffs = grid.zeros()
+    zeros_coeff = b[0]
+    lookup = grid.lookup
+    b_terms = [(grid.unravel(i), b[i]) for i in b_support]
+
+    for idx, offset in zip(grid.indices, grid.offsets):
+        val = a[offset]
+
+        for i_idx, b_val in b_terms:
+            # ``idx - i_idx`` lies in the index set when ``i_idx <= idx``
+            # holds for every variable
+            if all(map(le, i_idx, idx)):
+                val -= b_val * coeffs[lookup[tuple(map(sub, idx, i_idx))]]
+
+        coeffs[offset] = val / zeros_coeff
+
+    return coeffs
+
+
+def reciprocal(f: Coeffs, grid: Grid) -> Coeffs:
+    """Spectrum of ``1 / f`` by Newton iteration ``g <- g * (2 - f * g)``.
+
+    Every step doubles the total degree up to which ``g`` is exact and
+    works on the smallest tensor grid holding those indices, so the last
+    step alone costs two full products. Terms above that degree are
+    dropped after each step.
+
+    """
+    if (f0 := f[0]) == 0:
+        raise ZeroDivisionError(
+            "Leading coefficient of denominator is zero."
+        )
+
+    box = layout.grid((1,) * len(grid.orders))
+    coeffs = [sp.S.One / f0]
+    degree, precision = max(map(sum, grid.indices)), 1
+
+    while precision <= degree:
+        precision *= 2
+        step = layout.grid(tuple(min(n, precision) for n in grid.orders))
+        coeffs = layout.regrid(coeffs, box, step)
+        box = step
+
+        residual = [
+            -v for v in cauchy(layout.regrid(f, grid, box), coeffs, box)
+        ]
+        residual[0] += 1
+        coeffs = [
+            a + b if sum(idx) < precision else sp.S.Zero
+            for idx, a, b in zip(
+                box.indices,
+                coeffs,
+                cauchy(coeffs, residual, box)
+            )
+        ]
+
+    return layout.regrid(coeffs, box, grid)
+
+
+def integer_power(f: Coeffs, n: int, grid: Grid) -> Coeffs:
+    """Spectrum of ``f ** n`` for a non-negative integer ``n``
+    (binary exponentiation).
+
+    """
+    result = grid.zeros()
+    result[0] = sp.S.One
+
+    while n:
+        if n & 1:
+            result = cauchy(result, f, grid)
+        n >>= 1
+        if n:
+            f = cauchy(f, f, grid)
+
+    return result
+
+
+def power(f: Coeffs, alpha: sp.Expr, grid: Grid) -> Coeffs:
+    """Spectrum of ``f ** alpha`` for an arbitrary constant exponent.
+
+    Uses ``f * D(g) == alpha * D(f) * g`` which requires a non-zero
+    leading coefficient of ``f``.
+
+    """
+    if (f0 := f[0]) == 0:
+        raise ValueError(
+            "Leading coefficient must be non-zero for non-integer powers."
+        )
+
+    coeffs = grid.zeros()
+    coeffs[0] = sp.Pow(f0, alpha)
+
+    for offset, (k, terms) in zip(grid.offsets[1:], grid.recurrence[1:]):
+        val = sp.S.Zero
+        for i, j, i_k in terms:
+            if i:
+                val += (alpha * i_k - (k - i_k)) * f[i] * coeffs[j]
+
+        coeffs[offset] = val / (k * f0)
+
+    return coeffs
+
+
+def exp(f: Coeffs, grid: Grid) -> Coeffs:
+    """Spectrum of ``exp(f)`` from ``D(g) == D(f) * g``."""
+    coeffs = grid.zeros()
+    coeffs[0] = sp.exp(f[0])
+
+    for offset, (k, terms) in zip(grid.offsets[1:], grid.recurrence[1:]):
+        val = sp.S.Zero
+        for i, j, i_k in terms:
+            if i_k:
+                val += i_k * f[i] * coeffs[j]
+
+        coeffs[offset] = val / k
+
+    return coeffs
+
+
+def log(f: Coeffs, grid: Grid) -> Coeffs:
+    """Spectrum of ``log(f)`` from ``f * D(g) == D(f)``."""
+    if (f0 := f[0]) == 0:
+        raise ValueError("Logarithm of a spectrum with zero leading term.")
+
+    coeffs = grid.zeros()
+    coeffs[0] = sp.log(f0)
+
+    for offset, (k, terms) in zip(grid.offsets[1:], grid.recurrence[1:]):
+        val = k * f[offset]
+        for i, j, i_k in terms:
+            if i_k and i != offset:
+                val -= i_k * coeffs[i] * f[j]
+
+        coeffs[offset] = val / (k * f0)
+
+    return coeffs
+
+
+def sincos(f: Coeffs, grid: Grid) -> tuple[Coeffs, Coeffs]:
+    """Spectra of ``sin(f)`` and ``cos(f)``, computed together."""
+    sin = grid.zeros()
+    cos = grid.zeros()
+    sin[0] = sp.sin(f[0])
+    cos[0] = sp.cos(f[0])
+
+    for offset, (k, terms) in zip(grid.offsets[1:], grid.recurrence[1:]):
+        s_val = c_val = sp.S.Zero
+        for i, j, i_k in terms:
+            if i_k:
+                s_val += i_k * f[i] * cos[j]
+                c_val -= i_k * f[i] * sin[j]
+
+        sin[offset] = s_val / k
+        cos[offset] = c_val / k
+
+    return sin, cos
+
+
+def tanh(f: Coeffs, grid: Grid) -> Coeffs:
+    """Spectrum of ``tanh(f)`` from ``D(g) == D(f) * (1 - g ** 2)``, with
+    ``1 - g ** 2`` carried along.
+
+    """
+    coeffs = grid.zeros()
+    sech2 = grid.zeros()
+    coeffs[0] = sp.tanh(f[0])
+    sech2[0] = 1 - coeffs[0] ** 2
+
+    for offset, (k, terms) in zip(grid.offsets[1:], grid.recurrence[1:]):
+        val = sp.S.Zero
+        for i, j, i_k in terms:
+            if i_k:
+                val += i_k * f[i] * sech2[j]
+        coeffs[offset] = val / k
+
+        val = sp.S.Zero
+        for i, j, _ in terms:
+            val -= coeffs[i] * coeffs[j]
+        sech2[offset] = val
+
+    return coeffs
+
+
+def derivative(
+    f: Coeffs,
+    axis: int,
+    n: int,
+    scale: sp.Expr,
+    grid: Grid
+) -> Coeffs:
+    """Spectrum of the ``n``-th partial derivative along ``axis``, the
+    index shift ``G[m] == (m + 1) ... (m + n) * F[m + n] / H ** n``.
+
+    """
+    coeffs = grid.zeros()
+    lookup = grid.lookup
+    step = tuple(n * (m == axis) for m in range(len(grid.orders)))
+    scale_n = scale ** n
+
+    for idx, offset in zip(grid.indices, grid.offsets):
+        source = lookup.get(tuple(map(add, idx, step)))
+        if source is not None:
+            coeffs[offset] = (
+                sp.rf(idx[axis] + 1, n) * f[source] / scale_n
+            )
+
+    return coeffs
+
+
+def integral(
+    f: Coeffs,
+    axis: int,
+    scale: sp.Expr,
+    constant: sp.Expr,
+    grid: Grid
+) -> Coeffs:
+    """Spectrum of the antiderivative along ``axis`` with value
+    ``constant`` at the expansion center, the index shift
+    ``G[m] == F[m - 1] * H / m``.
+
+    """
+    coeffs = grid.zeros()
+    lookup = grid.lookup
+    step = tuple(int(m == axis) for m in range(len(grid.orders)))
+
+    for idx, offset in zip(grid.indices, grid.offsets):
+        if idx[axis]:
+            source = lookup[tuple(map(sub, idx, step))]
+            coeffs[offset] = f[source] * scale / idx[axis]
+
+    coeffs[0] = constant
+    return coeffs
+
+
+def revert(f: Coeffs, center: sp.Expr, scale: sp.Expr) -> Coeffs:
+    """Univariate spectrum of the inverse function of ``f`` around
+    ``f[0]``, mapping it back to ``center``, with the same ``scale``.
+
+    The coefficients ``t[m]`` of ``t = (g - center) / scale`` solve
+    ``f[1] * t[m] + sum(f[j] * (t ** j)[m]) == scale * (m == 1)`` one at
+    a time, coefficient ``m`` of ``t ** j`` for ``j >= 2`` only depending
+    on the earlier ones.
+
+    """
+    n = len(f)
+    t = [sp.S.Zero] * n
+    # powers[j][m] is coefficient m of t ** j
+    powers = [[sp.S.Zero] * n for _ in range(n)]
+
+    for m in range(1, n):
+        val = scale if m == 1 else sp.S.Zero
+        for j in range(2, m + 1):
+            powers[j][m] = sum(
+                (t[i] * powers[j - 1][m - i] for i in range(1, m - j + 2)),
+                sp.S.Zero
+            )
+            val -= f[j] * powers[j][m]
+
+        t[m] = powers[1][m] = val / f[1]
+
+    return [sp.sympify(center)] + [scale * val for val in t[1:]]
+
+
+def transform(
+    expr: sp.Expr,
+    variables: tuple,
+    center: dict,
+    scaling: dict,
+    grid: Grid,
+    fallback: Callable[[sp.Expr], Coeffs]
+) -> Coeffs:
+    """Build the spectrum of ``expr`` bottom-up from its expression tree.
+
+    Nodes without a known transformation rule (or whose rule does not
+    apply at the expansion center) are transformed by ``fallback``.
+
+    """
+    symbols = frozenset(variables)
+    cache: dict[sp.Expr, Coeffs] = {}
+
+    def constant(value: sp.Expr) -> Coeffs:
+        coeffs = grid.zeros()
+        coeffs[0] = value
+        return coeffs
+
+    def add(parts: list[Coeffs]) -> Coeffs:
+        return [sum(terms, sp.S.Zero) for terms in zip(*parts)]
+
+    def pow_(base: sp.Expr, exponent: sp.Expr) -> Coeffs:
+        if not exponent.free_symbols & symbols:
+            f = walk(base)
+            if exponent.is_Integer and exponent >= 0:
+                return integer_power(f, int(exponent), grid)
+            if exponent.is_Integer:
+                return quotient(
+                    constant(sp.S.One),
+                    integer_power(f, -int(exponent), grid),
+                    grid
+                )
+            return power(f, exponent, grid)
+
+        return exp(walk(exponent * sp.log(base)), grid)
+
+    def rule(node: sp.Expr) -> Coeffs:
+        if not node.free_symbols & symbols:
+            return constant(node)
+
+        if node.is_Symbol:
+            n = variables.index(node)
+            coeffs = constant(sp.sympify(center[node]))
+            if grid.orders[n] > 1:
+                unit = tuple(int(m == n) for m in range(len(variables)))
+                coeffs[grid.lookup[unit]] = sp.sympify(scaling[node])
+            return coeffs
+
+        if node.is_Add:
+            return add([walk(arg) for arg in node.args])
+
+        if node.is_Mul:
+            return reduce(
+                lambda a, b: cauchy(a, b, grid),
+                [walk(arg) for arg in node.args]
+            )
+
+        if node.is_Pow:
+            return pow_(*node.args)
+
+        if isinstance(node, sp.exp):
+            return exp(walk(node.args[0]), grid)
+
+        if isinstance(node, sp.log) and len(node.args) == 1:
+            return log(walk(node.args[0]), grid)
+
+        if isinstance(node, (sp.sin, sp.cos)):
+            sin, cos = sincos(walk(node.args[0]), grid)
+            return sin if isinstance(node, sp.sin) else cos
+
+        return fallback(node)
+
+    def walk(node: sp.Expr) -> Coeffs:
+        if node not in cache:
+            try:
+                cache[node] = rule(node)
+            except (ValueError, ZeroDivisionError):
+                cache[node] = fallback(node)
+
+        return cache[node]
+
+    return [canonical(value) for value in walk(expr)]
+
+
+def canonical(value: sp.Expr) -> sp.Expr:
+    """Common form of a coefficient, so that spectra built by ``transform``
+    and by differentiation compare equal.
+
+    Numbers are expanded, expressions in a symbolic center reduced to a
+    single fraction by ``cancel``. Unevaluated derivatives (of fallback
+    nodes) are left as they are.
+
+    """
+    value = sp.sympify(value)
+    if value.has(sp.Derivative, sp.Subs):
+        return value
+    if value.is_number:
+        return sp.expand(value)
+    return sp.cancel(value)